@@ -13,18 +13,65 @@ class Config:
     # Model Configuration
     MODEL_NAME = 'llama-3.3-70b-versatile'
     MODEL_TEMPERATURE = 0.7
+    GROQ_API_BASE = os.getenv('GROQ_API_BASE', 'https://api.groq.com')
+    LLM_TIMEOUT = float(os.getenv('LLM_TIMEOUT', '30'))
+    # Stream completions token by token (Groq SSE) instead of one response body
+    LLM_STREAMING = os.getenv('LLM_STREAMING', 'false').lower() == 'true'
+    
+    # LLM Client Pool
+    LLM_MAX_CONNECTIONS = int(os.getenv('LLM_MAX_CONNECTIONS', '20'))
+    LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', '8'))
+    LLM_TOKENS_PER_MINUTE = int(os.getenv('LLM_TOKENS_PER_MINUTE', '6000'))
+    LLM_EXPECTED_OUTPUT_TOKENS = 256
     EMBEDDING_MODEL = 'BAAI/bge-large-en-v1.5'
     
     # Document Processing
     CHUNK_SIZE = 500
     CHUNK_OVERLAP = 50
+    CHUNKING_STRATEGY = os.getenv('CHUNKING_STRATEGY', 'structure')  # 'structure' or 'recursive'
+    PARENT_CHUNK_SIZE = 1500
     
     # Vector Store
     VECTOR_STORE_PATH = 'faiss_index_custom'
+    INDEX_KEEP_VERSIONS = 3
+    INDEX_RELOAD_INTERVAL = 5  # seconds between CURRENT pointer checks
+    INDEX_RELOAD_MAX_BACKOFF = 600  # longest wait before retrying a version that failed to load
     
     # Retrieval Configuration
     RETRIEVAL_K = 6
     RETRIEVAL_TYPE = 'similarity'
+    PARENT_RETRIEVAL_K = 3
+    
+    # Metadata Filtering
+    FILTER_FIELDS = ('document', 'product', 'locale', 'effective_date')
+    DEFAULT_PRODUCT = 'general'
+    DEFAULT_LOCALE = 'en'
+    
+    # FAQ Fast Path
+    FAQ_FAST_PATH_ENABLED = os.getenv('FAQ_FAST_PATH_ENABLED', 'true').lower() == 'true'
+    FAQ_INDEX_PATH = 'faq_index_custom'
+    FAQ_MIN_SCORE = float(os.getenv('FAQ_MIN_SCORE', '0.9'))  # used until calibrated on the eval set
+    FAQ_MIN_SCORE_FLOOR = 0.75
+    FAQ_CALIBRATION_PRECISION = 0.95
+    FAQ_MAX_ANSWER_CHARS = 800
+    
+    # Batch Answering
+    BATCH_MAX_CONCURRENCY = int(os.getenv('BATCH_MAX_CONCURRENCY', '4'))
+    BATCH_CHUNK_SIZE = 50  # questions per checkpoint
+    
+    # JSON API
+    API_MAX_QUESTION_LENGTH = 1000
+    API_CACHE_SECONDS = int(os.getenv('API_CACHE_SECONDS', '300'))
+    
+    # Offline Evaluation
+    EVAL_MATCH_THRESHOLD = 0.6  # share of passage words a chunk must contain
+    
+    # Warm-up Configuration
+    WARMUP_ON_START = os.getenv('WARMUP_ON_START', 'true').lower() == 'true'
+    WARMUP_QUERY = 'How do I contact SafeBank support?'
+    WARMUP_MAX_SECONDS = int(os.getenv('WARMUP_MAX_SECONDS', '900'))  # keep retrying failed stages this long
+    WARMUP_RETRY_SECONDS = 2
+    WARMUP_MAX_RETRY_SECONDS = 60
     
     @classmethod
     def validate_config(cls):
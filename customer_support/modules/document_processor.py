@@ -1,8 +1,12 @@
+import json
 import os
+import re
 import sys
+from collections import Counter
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional
 
+import fitz
 from langchain_community.document_loaders import PyMuPDFLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
@@ -18,15 +22,20 @@ sys.path.insert(0, project_root)
 
 # Import Config - use absolute import
 from customer_support.modules.config import Config
-    
+
+# Leading section numbers such as "13. " or "2.1 "
+SECTION_NUMBER = re.compile(r'^\d+(\.\d+)*\.?\s+')
+
 class DocumentProcessor:
     """Handles document for loading and text splitting."""
     
-    def __init__(self):
+    def __init__(self, chunk_size: int = None, chunk_overlap: int = None):
         
+        self.chunk_size = chunk_size or Config.CHUNK_SIZE
+        self.chunk_overlap = Config.CHUNK_OVERLAP if chunk_overlap is None else chunk_overlap
         self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size = Config.CHUNK_SIZE,
-            chunk_overlap = Config.CHUNK_OVERLAP
+            chunk_size = self.chunk_size,
+            chunk_overlap = self.chunk_overlap
         )
         
     def load_pdf_documents(self, file_path: str) -> List[Document]:
@@ -74,6 +83,253 @@ class DocumentProcessor:
         print(f'Created {len(chunks)} text chunks')
         return chunks
     
+    def load_pdf_elements(self, file_path: str) -> List[Dict]:
+        """
+        Load text blocks and tables from a PDF with their layout information.
+        
+        Args:
+            file_path: Path to the PDF file
+            
+        Returns:
+            List of elements (type, text, page, font size, bold) in reading order
+        """
+        print(f'Loading PDF layout from: {file_path}')
+        
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f'PDF file not found: {file_path}')
+        
+        elements = []
+        with fitz.open(file_path) as pdf:
+            for page_number, page in enumerate(pdf):
+                page_elements = []
+                
+                # Tables are kept whole and their text blocks skipped below
+                tables = page.find_tables().tables
+                table_rects = [fitz.Rect(table.bbox) for table in tables]
+                for table in tables:
+                    page_elements.append({
+                        'type': 'table',
+                        'text': table.to_markdown().strip(),
+                        'page': page_number,
+                        'y': table.bbox[1]
+                    })
+                
+                for block in page.get_text('dict')['blocks']:
+                    if block['type'] != 0:
+                        continue
+                    if any(fitz.Rect(block['bbox']).intersects(rect) for rect in table_rects):
+                        continue
+                    
+                    spans = [span for line in block['lines'] for span in line['spans'] if span['text'].strip()]
+                    if not spans:
+                        continue
+                    
+                    text = '\n'.join(
+                        ''.join(span['text'] for span in line['spans']).strip()
+                        for line in block['lines']
+                    ).strip()
+                    page_elements.append({
+                        'type': 'text',
+                        'text': text,
+                        'page': page_number,
+                        'y': block['bbox'][1],
+                        'size': round(max(span['size'] for span in spans), 1),
+                        'bold': all(span['flags'] & 16 for span in spans)
+                    })
+                
+                page_elements.sort(key=lambda element: element['y'])
+                elements.extend(page_elements)
+        
+        print(f'Loaded {len(elements)} layout elements from PDF')
+        return elements
+    
+    def detect_headings(self, elements: List[Dict]):
+        """
+        Mark heading elements and their level from font size and weight.
+        
+        Args:
+            elements: Elements from load_pdf_elements (updated in place)
+        """
+        # Body text size is the size carrying the most characters
+        size_chars = Counter()
+        for element in elements:
+            if element['type'] == 'text':
+                size_chars[element['size']] += len(element['text'])
+        if not size_chars:
+            return
+        body_size = size_chars.most_common(1)[0][0]
+        
+        def is_heading(element):
+            text = element['text']
+            if element['type'] != 'text' or len(text) > 120 or text.endswith('.'):
+                return False
+            return element['size'] >= body_size * 1.15 or element['bold']
+        
+        # Larger fonts are higher-level headings; bold body text is the lowest
+        heading_sizes = sorted({e['size'] for e in elements if is_heading(e)}, reverse=True)
+        for element in elements:
+            if is_heading(element):
+                element['heading_level'] = heading_sizes.index(element['size']) + 1
+    
+    def split_table(self, table_text: str) -> List[str]:
+        """Split a markdown table on row boundaries, repeating the header."""
+        if len(table_text) <= self.chunk_size * 2:
+            return [table_text]
+        
+        lines = table_text.splitlines()
+        header, rows = lines[:2], lines[2:]
+        parts, current = [], list(header)
+        for row in rows:
+            if len(current) > 2 and len('\n'.join(current + [row])) > self.chunk_size:
+                parts.append('\n'.join(current))
+                current = list(header)
+            current.append(row)
+        parts.append('\n'.join(current))
+        return parts
+    
+    def load_document_metadata(self, pdf_path: str) -> Dict:
+        """
+        Document-level metadata used for filtered retrieval.
+        
+        Values come from an optional sidecar JSON next to the PDF
+        (e.g. data/safebank-manual.json), falling back to defaults.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            
+        Returns:
+            Dict with document, product, locale and effective_date
+        """
+        metadata = {
+            'document': os.path.basename(pdf_path),
+            'product': Config.DEFAULT_PRODUCT,
+            'locale': Config.DEFAULT_LOCALE,
+            'effective_date': None
+        }
+        
+        sidecar_path = os.path.splitext(pdf_path)[0] + '.json'
+        if os.path.exists(sidecar_path):
+            with open(sidecar_path) as f:
+                metadata.update(json.load(f))
+        
+        return metadata
+    
+    def split_documents_by_structure(self, elements: List[Dict], source: str = None,
+                                     document_metadata: Optional[Dict] = None) -> List[Document]:
+        """
+        Split layout elements into section-aligned parent/child chunks.
+        
+        Parents never cross a section or page boundary and tables are never
+        cut mid-row. Each child carries its parent's text so retrieval can
+        search small chunks but return the whole section.
+        
+        Args:
+            elements: Elements from load_pdf_elements
+            source: Source file recorded in metadata
+            document_metadata: Document-level metadata copied to every chunk
+            
+        Returns:
+            List of child chunk Documents
+        """
+        print('Splitting documents by structure...')
+        self.detect_headings(elements)
+        
+        # Group elements into parents
+        parents = []
+        section_stack = []
+        current = None
+        
+        for element in elements:
+            level = element.get('heading_level')
+            if level:
+                while section_stack and section_stack[-1][0] >= level:
+                    section_stack.pop()
+                section_stack.append((level, element['text'].replace('\n', ' ')))
+                current = None
+                continue
+            
+            section = ' > '.join(title for _, title in section_stack)
+            size = len(element['text'])
+            if (current is None or current['section'] != section or current['page'] != element['page']
+                    or current['size'] + size > Config.PARENT_CHUNK_SIZE):
+                current = {'section': section, 'page': element['page'], 'size': 0, 'elements': []}
+                parents.append(current)
+            current['elements'].append(element)
+            current['size'] += size
+        
+        # Split parents into children
+        children = []
+        for parent_number, parent in enumerate(parents):
+            parent_id = f'p{parent_number:05d}'
+            parent_text = '\n'.join(element['text'] for element in parent['elements'])
+            prefix = f"{parent['section']}\n" if parent['section'] else ''
+            
+            text = '\n'.join(e['text'] for e in parent['elements'] if e['type'] == 'text')
+            pieces = [('text', piece) for piece in self.text_splitter.split_text(text)] if text else []
+            for element in parent['elements']:
+                if element['type'] == 'table':
+                    pieces.extend(('table', piece) for piece in self.split_table(element['text']))
+            
+            for chunk_type, piece in pieces:
+                children.append(Document(
+                    page_content=prefix + piece,
+                    metadata={
+                        **(document_metadata or {}),
+                        'source': source,
+                        'page': parent['page'],
+                        'section': parent['section'],
+                        'chunk_type': chunk_type,
+                        'parent_id': parent_id,
+                        'parent_content': prefix + parent_text
+                    }
+                ))
+        
+        print(f'Created {len(children)} child chunks from {len(parents)} sections')
+        return children
+    
+    def extract_layout_faq_entries(self, elements: List[Dict], source: str = None) -> List[Dict]:
+        """
+        Map each detected section heading to the text that follows it.
+        
+        Manual headings are topics ("Password and Login Recovery") rather
+        than questions, so every heading is used as an FAQ key; the FAQ
+        index matches user questions against it by embedding similarity.
+        Only elements detected as headings by font size or weight can
+        start an entry, so wrapped body lines never become keys.
+        
+        Args:
+            elements: Elements from load_pdf_elements
+            source: Source file recorded in metadata
+            
+        Returns:
+            List of dicts with question (the heading), answer and metadata
+        """
+        print('Extracting FAQ entries from headings...')
+        self.detect_headings(elements)
+        entries = []
+        current = None
+        
+        for element in elements:
+            if element.get('heading_level'):
+                if current and current['answer']:
+                    entries.append(current)
+                
+                # "13. Customer Support" -> "Customer Support"
+                heading = SECTION_NUMBER.sub('', ' '.join(element['text'].split()))
+                current = {
+                    'question': heading,
+                    'answer': '',
+                    'metadata': {'source': source, 'page': element['page']}
+                } if heading else None
+            elif current and len(current['answer']) < Config.FAQ_MAX_ANSWER_CHARS:
+                current['answer'] = f"{current['answer']}\n{element['text']}".strip()
+        
+        if current and current['answer']:
+            entries.append(current)
+        
+        print(f'Extracted {len(entries)} FAQ entries')
+        return entries
+    
     def process_pdf_file(self, pdf_path: str) -> List[str]:
         """
         Complete pipeline: Load PDF and split into chunks.
@@ -97,6 +353,29 @@ class DocumentProcessor:
             
         return chunks
     
+    def process_pdf_structured(self, pdf_path: str) -> List[Document]:
+        """
+        Complete pipeline: Load PDF layout and split into section-aligned chunks.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            
+        Returns:
+            List of child chunk Documents with page, section and document metadata
+        """
+        elements = self.load_pdf_elements(pdf_path)
+        chunks = self.split_documents_by_structure(
+            elements,
+            source=pdf_path,
+            document_metadata=self.load_document_metadata(pdf_path)
+        )
+        
+        if chunks:
+            print(f'\n Sample chunk (first 300 characters):')
+            print(chunks[0].page_content[:300] + '...')
+        
+        return chunks
+    
 # Test the document processor
 if __name__=='__main__':
     
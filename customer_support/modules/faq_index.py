@@ -0,0 +1,214 @@
+import json
+import os
+import shutil
+import sys
+import threading
+import uuid
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+# Setup imports
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.insert(0, project_root)
+
+from customer_support.modules.config import Config
+
+
+class FAQIndex:
+    """Precomputed question -> answer index for extractive fast-path answers."""
+
+    def __init__(self, embeddings, entries: List[Dict], vectors: np.ndarray,
+                 min_score: Optional[float] = None):
+        self.embeddings = embeddings
+        self.entries = entries
+        self.vectors = vectors
+        # Calibrated on a labeled set by `calibrate`; Config.FAQ_MIN_SCORE otherwise
+        self.min_score = min_score if min_score is not None else Config.FAQ_MIN_SCORE
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.hits = 0
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    @classmethod
+    def build(cls, entries: List[Dict], embeddings) -> 'FAQIndex':
+        """
+        Embed FAQ questions at ingest time.
+
+        Args:
+            entries: FAQ entries from DocumentProcessor.extract_layout_faq_entries
+            embeddings: Embedding model shared with the vector store
+
+        Returns:
+            FAQIndex
+        """
+        print(f'Building FAQ index from {len(entries)} entries...')
+        if entries:
+            vectors = np.array(
+                embeddings.embed_documents([entry['question'] for entry in entries]),
+                dtype='float32'
+            )
+            vectors = cls._normalize(vectors)
+        else:
+            vectors = np.zeros((0, 0), dtype='float32')
+        return cls(embeddings, entries, vectors)
+
+    def save(self, save_path: str = None):
+        """
+        Save FAQ entries and question vectors to disk.
+
+        Files are written to a temporary directory that is renamed into
+        place, so readers never load a half-written index. If another
+        process publishes save_path first, its copy is kept.
+        """
+        if save_path is None:
+            save_path = Config.FAQ_INDEX_PATH
+
+        print(f'Saving FAQ index to: {save_path}')
+        tmp_path = f'{save_path}.{uuid.uuid4().hex}.tmp'
+        os.makedirs(tmp_path)
+        try:
+            np.save(os.path.join(tmp_path, 'vectors.npy'), self.vectors)
+            with open(os.path.join(tmp_path, 'entries.json'), 'w') as f:
+                json.dump(self.entries, f)
+            with open(os.path.join(tmp_path, 'settings.json'), 'w') as f:
+                json.dump({'min_score': self.min_score}, f)
+            os.rename(tmp_path, save_path)
+        except OSError:
+            if not os.path.exists(save_path):
+                raise
+            print(f'FAQ index already published at: {save_path}')
+        finally:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+
+    @classmethod
+    def load(cls, embeddings, load_path: str = None) -> 'FAQIndex':
+        """Load a FAQ index saved with `save`."""
+        if load_path is None:
+            load_path = Config.FAQ_INDEX_PATH
+
+        print(f'Loading FAQ index from: {load_path}')
+        if not os.path.exists(load_path):
+            raise FileNotFoundError(f'FAQ index not found at: {load_path}')
+
+        vectors = np.load(os.path.join(load_path, 'vectors.npy'))
+        with open(os.path.join(load_path, 'entries.json')) as f:
+            entries = json.load(f)
+
+        # Indexes saved before calibration existed have no settings file
+        settings = {}
+        settings_path = os.path.join(load_path, 'settings.json')
+        if os.path.exists(settings_path):
+            with open(settings_path) as f:
+                settings = json.load(f)
+        return cls(embeddings, entries, vectors, settings.get('min_score'))
+
+    def _best(self, vectors):
+        """Best entry and its cosine similarity for each query vector."""
+        queries = self._normalize(np.array(vectors, dtype='float32'))
+        scores = self.vectors @ queries.T
+        best = scores.argmax(axis=0)
+        return [(int(row), float(scores[row, column])) for column, row in enumerate(best)]
+
+    def calibrate(self, vectors, is_correct: Callable[[int, Dict], bool],
+                  target_precision: float = None) -> Optional[float]:
+        """
+        Set min_score from labeled questions.
+
+        Picks the lowest threshold at which fast-path answers on the labeled
+        set are still correct often enough, never below FAQ_MIN_SCORE_FLOOR.
+
+        Args:
+            vectors: Embeddings of the labeled questions
+            is_correct: Called with (question number, entry); True if the entry answers it
+            target_precision: Share of fast-path answers that must be correct
+
+        Returns:
+            The new min_score, or None if no threshold reaches the target
+        """
+        if not self.entries or not len(vectors):
+            return None
+        target_precision = target_precision or Config.FAQ_CALIBRATION_PRECISION
+
+        scored = sorted(
+            ((score, is_correct(number, self.entries[row]))
+             for number, (row, score) in enumerate(self._best(vectors))),
+            key=lambda item: item[0],
+            reverse=True
+        )
+
+        threshold = None
+        correct = 0
+        for answered, (score, is_right) in enumerate(scored, 1):
+            correct += is_right
+            # Only thresholds that cut between distinct scores are usable
+            next_score = scored[answered][0] if answered < len(scored) else None
+            if correct / answered >= target_precision and next_score != score:
+                threshold = score
+
+        if threshold is None:
+            print(f'FAQ calibration: no threshold reaches precision {target_precision}')
+            return None
+
+        self.min_score = max(round(threshold, 4), Config.FAQ_MIN_SCORE_FLOOR)
+        print(f'FAQ calibration: min_score={self.min_score} from {len(scored)} labeled questions')
+        return self.min_score
+
+    def match(self, question: str) -> Optional[Dict]:
+        """
+        Return the best FAQ entry if its similarity clears min_score.
+
+        Args:
+            question: User question
+
+        Returns:
+            Matching entry with its score, or None
+        """
+        if not self.entries:
+            return None
+        return self.match_vectors([question], [self.embeddings.embed_query(question)])[0]
+
+    def match_vectors(self, questions: List[str], vectors) -> List[Optional[Dict]]:
+        """
+        Match a batch of already embedded questions in one matrix product.
+
+        Args:
+            questions: User questions
+            vectors: Their embeddings
+
+        Returns:
+            Matching entry with its score (or None) per question
+        """
+        if not self.entries:
+            return [None] * len(questions)
+
+        matches = []
+        for row, score in self._best(vectors):
+            if score < self.min_score:
+                matches.append(None)
+                continue
+            print(f'FAQ fast path hit (score {score:.3f}): {self.entries[row]["question"][:40]}')
+            matches.append(dict(self.entries[row], score=score))
+
+        hits = sum(match is not None for match in matches)
+        with self._lock:
+            self.lookups += len(questions)
+            self.hits += hits
+
+        return matches
+
+    def report(self) -> Dict:
+        """How often the fast path fires."""
+        with self._lock:
+            return {
+                'entries': len(self.entries),
+                'min_score': self.min_score,
+                'lookups': self.lookups,
+                'hits': self.hits,
+                'hit_rate': round(self.hits / self.lookups, 3) if self.lookups else 0.0
+            }
@@ -0,0 +1,261 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+# Setup imports
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.insert(0, project_root)
+
+from customer_support.modules.config import Config
+
+INDEX_FILES = ('index.faiss', 'index.pkl')
+# Written by FAQIndex.save into the version's faq/ directory
+FAQ_FILES = tuple(os.path.join('faq', name) for name in ('vectors.npy', 'entries.json', 'settings.json'))
+DEFAULT_PDF_PATH = os.path.join(project_root, 'data', 'safebank-manual.pdf')
+DEFAULT_EVAL_SET_PATH = os.path.join(project_root, 'data', 'eval', 'safebank_retrieval.jsonl')
+
+
+class IndexVersionStore:
+    """
+    Versioned FAISS index directories with atomic promotion.
+
+    Layout under the vector store path:
+        versions/<version>/index.faiss, index.pkl, manifest.json
+        versions/<version>/faq/  FAQ fast-path index built from the same PDF
+        CURRENT   version readers should load
+        PREVIOUS  version to roll back to
+
+    A version directory is only visible once fully written, and the
+    CURRENT/PREVIOUS pointers are replaced with an atomic rename, so
+    readers never see a half-written index.
+    """
+
+    def __init__(self, root: str = None):
+        self.root = root or Config.VECTOR_STORE_PATH
+        self.versions_dir = os.path.join(self.root, 'versions')
+
+    def is_versioned(self) -> bool:
+        return os.path.exists(os.path.join(self.root, 'CURRENT'))
+
+    def version_path(self, version: str) -> str:
+        return os.path.join(self.versions_dir, version)
+
+    def _read_pointer(self, name: str) -> Optional[str]:
+        path = os.path.join(self.root, name)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return f.read().strip() or None
+
+    def _write_pointer(self, name: str, version: str):
+        path = os.path.join(self.root, name)
+        tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(version)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def current_version(self) -> Optional[str]:
+        return self._read_pointer('CURRENT')
+
+    def previous_version(self) -> Optional[str]:
+        return self._read_pointer('PREVIOUS')
+
+    def faq_path(self, version: str) -> str:
+        return os.path.join(self.version_path(version), 'faq')
+
+    @staticmethod
+    def checksum(path: str) -> str:
+        """SHA-256 over the index (and FAQ, if present) files of a version directory."""
+        digest = hashlib.sha256()
+        names = INDEX_FILES + tuple(
+            name for name in FAQ_FILES if os.path.exists(os.path.join(path, name))
+        )
+        for name in names:
+            with open(os.path.join(path, name), 'rb') as f:
+                for block in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(block)
+        return digest.hexdigest()
+
+    def manifest(self, version: str) -> Dict:
+        with open(os.path.join(self.version_path(version), 'manifest.json')) as f:
+            return json.load(f)
+
+    def list_versions(self) -> List[Dict]:
+        """Manifests of all complete versions, oldest first."""
+        if not os.path.exists(self.versions_dir):
+            return []
+        versions = [
+            name for name in os.listdir(self.versions_dir)
+            if not name.startswith('.')
+            and os.path.exists(os.path.join(self.versions_dir, name, 'manifest.json'))
+        ]
+        return sorted((self.manifest(v) for v in versions), key=lambda m: m['created_at'])
+
+    def write(self, vector_store, faq_index=None) -> str:
+        """
+        Write a vector store as a new (not yet promoted) version.
+
+        Args:
+            vector_store: FAISS vector store
+            faq_index: Optional FAQIndex built from the same documents
+
+        Returns:
+            Version id
+        """
+        created_at = datetime.now(timezone.utc)
+        version = f"{created_at.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        tmp_path = os.path.join(self.versions_dir, f'.{version}.tmp')
+
+        try:
+            vector_store.save_local(tmp_path)
+            if faq_index is not None:
+                faq_index.save(os.path.join(tmp_path, 'faq'))
+            manifest = {
+                'version': version,
+                'created_at': created_at.isoformat(),
+                'embedding_model': Config.EMBEDDING_MODEL,
+                'chunking_strategy': Config.CHUNKING_STRATEGY,
+                'chunk_size': Config.CHUNK_SIZE,
+                'chunk_overlap': Config.CHUNK_OVERLAP,
+                'chunk_count': vector_store.index.ntotal,
+                'faq_entries': len(faq_index.entries) if faq_index is not None else None,
+                'faq_min_score': faq_index.min_score if faq_index is not None else None,
+                'checksum': self.checksum(tmp_path)
+            }
+            with open(os.path.join(tmp_path, 'manifest.json'), 'w') as f:
+                json.dump(manifest, f, indent=2)
+
+            os.rename(tmp_path, self.version_path(version))
+        except BaseException:
+            # Don't leave half-written versions behind
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            raise
+
+        print(f'Index version written: {version}')
+        return version
+
+    def verify(self, version: str) -> Dict:
+        """Check a version's checksum and embedding model before it is served."""
+        manifest = self.manifest(version)
+        if manifest['embedding_model'] != Config.EMBEDDING_MODEL:
+            raise ValueError(
+                f"Index {version} was built with {manifest['embedding_model']}, "
+                f'not {Config.EMBEDDING_MODEL}'
+            )
+        if self.checksum(self.version_path(version)) != manifest['checksum']:
+            raise ValueError(f'Checksum mismatch for index version {version}')
+        return manifest
+
+    def promote(self, version: str):
+        """Atomically make `version` the one readers load."""
+        self.verify(version)
+        current = self.current_version()
+        if current and current != version:
+            self._write_pointer('PREVIOUS', current)
+        self._write_pointer('CURRENT', version)
+        print(f'Promoted index version: {version}')
+        self.prune()
+
+    def rollback(self) -> str:
+        """Swap back to the previous version."""
+        previous = self.previous_version()
+        if previous is None:
+            raise ValueError('No previous index version to roll back to')
+        self.promote(previous)
+        return previous
+
+    def prune(self, keep: int = None):
+        """Delete old versions, always keeping CURRENT and PREVIOUS."""
+        keep = keep or Config.INDEX_KEEP_VERSIONS
+        pinned = {self.current_version(), self.previous_version()}
+        versions = [m['version'] for m in self.list_versions()]
+        for version in versions[:-keep]:
+            if version not in pinned:
+                shutil.rmtree(self.version_path(version), ignore_errors=True)
+                print(f'Pruned index version: {version}')
+
+
+def build_version(pdf_path: str, save_path: str = None, promote: bool = True,
+                  eval_set_path: str = None) -> str:
+    """
+    Ingest a PDF into a new index version, with its FAQ index alongside.
+
+    Args:
+        pdf_path: PDF to ingest
+        save_path: Vector store path (defaults to Config.VECTOR_STORE_PATH)
+        promote: Make the new version current once written
+        eval_set_path: Labeled questions used to calibrate the FAQ threshold
+
+    Returns:
+        Version id
+    """
+    # Imported here: vector_store imports this module
+    from customer_support.modules.document_processor import DocumentProcessor
+    from customer_support.modules.faq_index import FAQIndex
+    from customer_support.modules.vector_store import VectorStoreManager
+
+    processor = DocumentProcessor()
+    vs_manager = VectorStoreManager()
+
+    if Config.CHUNKING_STRATEGY == 'structure':
+        chunks = processor.process_pdf_structured(pdf_path)
+    else:
+        chunks = processor.process_pdf_file(pdf_path)
+    vector_store = vs_manager.create_vector_store(chunks)
+
+    faq_index = None
+    if Config.FAQ_FAST_PATH_ENABLED:
+        entries = processor.extract_layout_faq_entries(processor.load_pdf_elements(pdf_path), source=pdf_path)
+        faq_index = FAQIndex.build(entries, vs_manager.embeddings)
+        if eval_set_path and os.path.exists(eval_set_path):
+            from customer_support.modules.retrieval_eval import calibrate_faq_index, load_eval_set
+            calibrate_faq_index(faq_index, load_eval_set(eval_set_path))
+
+    return vs_manager.save_vector_store(vector_store, save_path, promote=promote, faq_index=faq_index)
+
+
+def main():
+    """Build, inspect and switch index versions."""
+    parser = argparse.ArgumentParser(description='Manage FAISS index versions')
+    parser.add_argument('--path', default=Config.VECTOR_STORE_PATH)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build_parser = subparsers.add_parser('build', help='Ingest a PDF into a new version')
+    build_parser.add_argument('--pdf', default=DEFAULT_PDF_PATH)
+    build_parser.add_argument('--eval-set', default=DEFAULT_EVAL_SET_PATH,
+                              help='Labeled questions used to calibrate the FAQ threshold')
+    build_parser.add_argument('--no-promote', action='store_true',
+                              help='Write the version without making it current')
+    subparsers.add_parser('list')
+    promote_parser = subparsers.add_parser('promote')
+    promote_parser.add_argument('version')
+    subparsers.add_parser('rollback')
+    args = parser.parse_args()
+
+    store = IndexVersionStore(args.path)
+    if args.command == 'build':
+        version = build_version(args.pdf, args.path, promote=not args.no_promote,
+                                eval_set_path=args.eval_set)
+        print(f"Built index version: {version}{'' if args.no_promote else ' (current)'}")
+    elif args.command == 'list':
+        current = store.current_version()
+        for manifest in store.list_versions():
+            marker = '*' if manifest['version'] == current else ' '
+            print(f"{marker} {manifest['version']}  chunks={manifest['chunk_count']}  "
+                  f"faq={manifest.get('faq_entries')}  model={manifest['embedding_model']}")
+    elif args.command == 'promote':
+        store.promote(args.version)
+    else:
+        print(f'Rolled back to: {store.rollback()}')
+
+
+if __name__ == '__main__':
+    main()
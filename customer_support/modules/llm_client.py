@@ -0,0 +1,316 @@
+import asyncio
+import contextvars
+import heapq
+import itertools
+import math
+import os
+import re
+import sys
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, List, Optional
+
+import httpx
+
+# Setup imports
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.insert(0, project_root)
+
+from customer_support.modules.config import Config
+from langchain_groq import ChatGroq
+from langchain_core.language_models.chat_models import agenerate_from_stream, generate_from_stream
+from langchain_core.messages import BaseMessage
+
+
+# Lower rank is admitted first
+PRIORITIES = {'interactive': 0, 'batch': 1}
+
+_priority = contextvars.ContextVar('llm_priority', default='interactive')
+
+
+@contextmanager
+def llm_priority(name: str):
+    """Run the enclosed LLM calls at the given priority ('interactive' or 'batch')."""
+    if name not in PRIORITIES:
+        raise ValueError(f'Unknown LLM priority: {name}')
+    token = _priority.set(name)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def parse_reset_duration(value: Optional[str]) -> float:
+    """Parse rate-limit reset values such as '7.66s', '2m59.56s' or '120ms'."""
+    if not value:
+        return 0.0
+    try:
+        return float(value)
+    except ValueError:
+        pass
+
+    units = {'h': 3600, 'm': 60, 's': 1, 'ms': 0.001}
+    total = 0.0
+    for amount, unit in re.findall(r'([\d.]+)(ms|h|m|s)', value):
+        total += float(amount) * units[unit]
+    return total
+
+
+def estimate_prompt_tokens(messages: List[BaseMessage]) -> int:
+    """Rough prompt size: ~4 characters per token."""
+    return sum(len(str(message.content)) for message in messages) // 4
+
+
+def estimate_tokens(messages: List[BaseMessage]) -> int:
+    """Rough token cost of a request: prompt plus the expected output."""
+    return estimate_prompt_tokens(messages) + Config.LLM_EXPECTED_OUTPUT_TOKENS
+
+
+class TokenBucket:
+    """Token bucket sized to the provider's tokens-per-minute limit."""
+
+    def __init__(self, tokens_per_minute: int):
+        self.capacity = float(tokens_per_minute)
+        self.rate = tokens_per_minute / 60.0
+        self.tokens = self.capacity
+        self.blocked_until = 0.0
+        self.updated_at = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def wait_time(self, tokens: int) -> float:
+        """Seconds until `tokens` can be spent (0 if available now)."""
+        self._refill()
+        now = time.monotonic()
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        # Requests larger than the bucket are let through once it is full
+        needed = min(tokens, self.capacity) - self.tokens
+        return max(0.0, needed / self.rate)
+
+    def consume(self, tokens: int):
+        self._refill()
+        self.tokens -= tokens
+
+    def sync(self, remaining: int, reset_seconds: float):
+        """Trust the provider's view of remaining tokens when it is lower than ours."""
+        self._refill()
+        if remaining < self.tokens:
+            self.tokens = float(remaining)
+        if remaining <= 0 and reset_seconds:
+            self.pause(reset_seconds)
+
+    def pause(self, seconds: float):
+        """Stop admitting requests for `seconds` (e.g. after a 429)."""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+class RequestLimiter:
+    """Concurrency semaphore with priority queueing, gated by a token bucket."""
+
+    # Async waiters cannot be woken by the thread condition, so they re-check this often
+    ASYNC_POLL_SECONDS = 0.05
+
+    def __init__(self, max_concurrency: int, tokens_per_minute: int):
+        self.max_concurrency = max_concurrency
+        self.bucket = TokenBucket(tokens_per_minute)
+        self.active = 0
+        self._waiting = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+
+    def _enqueue(self, priority: str):
+        ticket = (PRIORITIES[priority], next(self._counter))
+        with self._condition:
+            heapq.heappush(self._waiting, ticket)
+        return ticket
+
+    def _abandon(self, ticket):
+        """Drop a waiter that gave up so it does not block the queue behind it."""
+        with self._condition:
+            if ticket in self._waiting:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+            self._condition.notify_all()
+
+    def _try_admit(self, ticket, tokens: int) -> float:
+        """
+        Admit the ticket if it is next and a slot and tokens are free.
+
+        Returns:
+            0 when admitted, otherwise seconds to wait (inf until notified)
+        """
+        if self._waiting[0] != ticket or self.active >= self.max_concurrency:
+            return math.inf
+        delay = self.bucket.wait_time(tokens)
+        if delay > 0:
+            return delay
+
+        heapq.heappop(self._waiting)
+        self.active += 1
+        self.bucket.consume(tokens)
+        self._condition.notify_all()
+        return 0.0
+
+    def acquire(self, tokens: int, priority: str = 'interactive'):
+        """Block until a slot and enough tokens are available for this request."""
+        ticket = self._enqueue(priority)
+        try:
+            with self._condition:
+                while True:
+                    delay = self._try_admit(ticket, tokens)
+                    if delay == 0:
+                        return
+                    self._condition.wait(timeout=None if delay == math.inf else delay)
+        except BaseException:
+            self._abandon(ticket)
+            raise
+
+    async def aacquire(self, tokens: int, priority: str = 'interactive'):
+        """Wait on the event loop for a slot; cancelling the task leaves nothing held."""
+        ticket = self._enqueue(priority)
+        try:
+            while True:
+                with self._condition:
+                    delay = self._try_admit(ticket, tokens)
+                if delay == 0:
+                    return
+                await asyncio.sleep(min(delay, self.ASYNC_POLL_SECONDS))
+        except BaseException:
+            self._abandon(ticket)
+            raise
+
+    def release(self):
+        with self._condition:
+            self.active -= 1
+            self._condition.notify_all()
+
+    def on_rate_limit(self, remaining: Optional[str], reset: Optional[str],
+                      retry_after: Optional[str] = None):
+        """Update the bucket from the provider's rate-limit headers."""
+        with self._condition:
+            if remaining is not None:
+                self.bucket.sync(int(float(remaining)), parse_reset_duration(reset))
+            if retry_after is not None:
+                self.bucket.pause(parse_reset_duration(retry_after) or 1.0)
+            self._condition.notify_all()
+
+    @contextmanager
+    def slot(self, tokens: int):
+        self.acquire(tokens, _priority.get())
+        try:
+            yield
+        finally:
+            self.release()
+
+    @asynccontextmanager
+    async def aslot(self, tokens: int):
+        await self.aacquire(tokens, _priority.get())
+        try:
+            yield
+        finally:
+            self.release()
+
+
+class LimitedChatGroq(ChatGroq):
+    """ChatGroq whose calls go through the shared request limiter."""
+
+    limiter: Any = None
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        if self.streaming:
+            # _stream holds the slot; taking it here too would count the call twice
+            return generate_from_stream(self._stream(messages, stop=stop, run_manager=run_manager, **kwargs))
+        with self.limiter.slot(estimate_tokens(messages)):
+            return super()._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        with self.limiter.slot(estimate_tokens(messages)):
+            yield from super()._stream(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        if self.streaming:
+            return await agenerate_from_stream(
+                self._astream(messages, stop=stop, run_manager=run_manager, **kwargs)
+            )
+        async with self.limiter.aslot(estimate_tokens(messages)):
+            return await super()._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        async with self.limiter.aslot(estimate_tokens(messages)):
+            async for chunk in super()._astream(messages, stop=stop, run_manager=run_manager, **kwargs):
+                yield chunk
+
+
+class LLMClient:
+    """Process-wide LLM client: pooled keep-alive connections and rate limiting."""
+
+    def __init__(self, base_url: str = None):
+        self.base_url = base_url or Config.GROQ_API_BASE
+        self.limiter = RequestLimiter(
+            max_concurrency=Config.LLM_MAX_CONCURRENCY,
+            tokens_per_minute=Config.LLM_TOKENS_PER_MINUTE
+        )
+
+        limits = httpx.Limits(
+            max_connections=Config.LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=Config.LLM_MAX_CONNECTIONS
+        )
+        self.http_client = httpx.Client(
+            limits=limits,
+            timeout=Config.LLM_TIMEOUT,
+            event_hooks={'response': [self._on_response]}
+        )
+        self.async_http_client = httpx.AsyncClient(
+            limits=limits,
+            timeout=Config.LLM_TIMEOUT,
+            event_hooks={'response': [self._on_async_response]}
+        )
+
+    def _on_response(self, response: httpx.Response):
+        headers = response.headers
+        retry_after = headers.get('retry-after') if response.status_code == 429 else None
+        self.limiter.on_rate_limit(
+            headers.get('x-ratelimit-remaining-tokens'),
+            headers.get('x-ratelimit-reset-tokens'),
+            retry_after
+        )
+
+    async def _on_async_response(self, response: httpx.Response):
+        self._on_response(response)
+
+    def chat_model(self, **kwargs) -> LimitedChatGroq:
+        """Create a chat model that shares this client's pool and limiter."""
+        params = {
+            'model': Config.MODEL_NAME,
+            'temperature': Config.MODEL_TEMPERATURE,
+            'api_key': Config.GROQ_API_KEY,
+            'streaming': Config.LLM_STREAMING,
+        }
+        params.update(kwargs)
+        return LimitedChatGroq(
+            base_url=self.base_url,
+            http_client=self.http_client,
+            http_async_client=self.async_http_client,
+            limiter=self.limiter,
+            **params
+        )
+
+
+_client_lock = threading.Lock()
+_client = None
+
+
+def get_llm_client() -> LLMClient:
+    """Return the shared LLM client, creating it on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            print(f'Creating shared LLM client for: {Config.GROQ_API_BASE}')
+            _client = LLMClient()
+    return _client
@@ -0,0 +1,356 @@
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, List
+
+import httpx
+
+# Setup imports
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.insert(0, project_root)
+
+from customer_support.modules.mock_llm_server import MockLLMSettings, start_mock_server
+
+DJANGO_DIR = os.path.join(project_root, 'djrag_project')
+
+SERVER_COMMANDS = {
+    'wsgi': ['gunicorn', 'djrag_project.wsgi:application', '--bind', '{host}:{port}',
+             '--workers', '{workers}', '--threads', '{threads}', '--timeout', '120'],
+    'asgi': ['uvicorn', 'djrag_project.asgi:application', '--host', '{host}', '--port', '{port}',
+             '--workers', '{workers}'],
+}
+
+
+def load_questions(path: str) -> List[str]:
+    """Questions from a JSONL file with a "question" field per line."""
+    with open(path) as f:
+        return [json.loads(line)['question'] for line in f if line.strip()]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def read_rss_mb(pid: int) -> float:
+    """Resident set size of a process from /proc (Linux)."""
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def child_pids(parent: int) -> List[int]:
+    """Direct children of a process, found by scanning /proc."""
+    children = []
+    for name in os.listdir('/proc'):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f'/proc/{name}/stat') as f:
+                # ppid is the 2nd field after the parenthesised command name
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == parent:
+            children.append(int(name))
+    return children
+
+
+class AppServer:
+    """Runs djrag_project under gunicorn (WSGI) or uvicorn (ASGI) against the mock LLM."""
+
+    def __init__(self, mode: str, host: str, port: int, workers: int, threads: int, llm_base_url: str,
+                 llm_streaming: bool = False):
+        if mode not in SERVER_COMMANDS:
+            raise ValueError(f'Unknown server mode: {mode}')
+        executable = SERVER_COMMANDS[mode][0]
+        if shutil.which(executable) is None:
+            raise RuntimeError(f'{executable} is required for {mode} load tests (pip install {executable})')
+
+        self.mode = mode
+        self.base_url = f'http://{host}:{port}'
+        self.command = [
+            part.format(host=host, port=port, workers=workers, threads=threads)
+            for part in SERVER_COMMANDS[mode]
+        ]
+        self.env = dict(
+            os.environ,
+            GROQ_API_BASE=llm_base_url,
+            GROQ_API_KEY=os.environ.get('GROQ_API_KEY', 'mock-key'),
+            LLM_STREAMING='true' if llm_streaming else 'false',
+            PYTHONUNBUFFERED='1'
+        )
+        self.process = None
+
+    def start(self, ready_timeout: float):
+        print(f'Starting {self.mode} server: {" ".join(self.command)}')
+        self.process = subprocess.Popen(self.command, cwd=DJANGO_DIR, env=self.env)
+
+        # Wait for warm-up so model loading is not counted as request latency
+        deadline = time.monotonic() + ready_timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f'{self.mode} server exited with code {self.process.returncode}')
+            try:
+                if httpx.get(f'{self.base_url}/readyz', timeout=2).status_code == 200:
+                    print(f'{self.mode} server ready at {self.base_url}')
+                    return
+            except httpx.HTTPError:
+                pass
+            time.sleep(1)
+        raise TimeoutError(f'{self.mode} server not ready after {ready_timeout}s')
+
+    def worker_rss_mb(self) -> Dict[int, float]:
+        """RSS of each worker process (the master itself if it has none)."""
+        pids = child_pids(self.process.pid) or [self.process.pid]
+        rss = {}
+        for pid in pids:
+            try:
+                rss[pid] = round(read_rss_mb(pid), 1)
+            except OSError:
+                continue
+        return rss
+
+    def stop(self):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+
+class VirtualUser:
+    """One simulated user submitting questions through the HTML form (or JSON API)."""
+
+    def __init__(self, base_url: str, endpoint: str, questions: List[str]):
+        self.client = httpx.Client(base_url=base_url, timeout=120)
+        self.endpoint = endpoint
+        self.questions = questions
+        self.csrf_token = None
+
+    def setup(self):
+        if self.endpoint == '/query/':
+            # The index page sets the CSRF cookie the form post needs
+            self.client.get('/')
+            self.csrf_token = self.client.cookies.get('csrftoken')
+
+    def request(self) -> Dict:
+        question = random.choice(self.questions)
+        started = time.perf_counter()
+        try:
+            if self.endpoint == '/query/':
+                response = self.client.post(
+                    '/query/',
+                    data={'question': question, 'csrfmiddlewaretoken': self.csrf_token},
+                    headers={'X-CSRFToken': self.csrf_token or ''}
+                )
+                # The view renders errors into the page with a 200
+                ok = response.status_code == 200 and 'alert-danger' not in response.text
+            else:
+                response = self.client.post(self.endpoint, json={'question': question})
+                ok = response.status_code == 200
+            error = None if ok else f'HTTP {response.status_code}'
+        except httpx.HTTPError as e:
+            ok, error = False, type(e).__name__
+        return {'latency_ms': (time.perf_counter() - started) * 1000, 'ok': ok, 'error': error}
+
+    def close(self):
+        self.client.close()
+
+
+def run_users(server: AppServer, users: int, endpoint: str, questions: List[str],
+              duration: float = None, total_requests: int = None, on_progress=None) -> List[Dict]:
+    """Run `users` concurrent virtual users until the duration or request budget is spent."""
+    results = []
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration if duration else None
+
+    def keep_going():
+        if deadline is not None:
+            return time.monotonic() < deadline
+        return len(results) < total_requests
+
+    def user_loop():
+        user = VirtualUser(server.base_url, endpoint, questions)
+        try:
+            user.setup()
+            while keep_going():
+                result = user.request()
+                with lock:
+                    results.append(result)
+                    count = len(results)
+                # Outside the lock: sampling must not stall the other users
+                if on_progress:
+                    on_progress(count)
+        finally:
+            user.close()
+
+    threads = [threading.Thread(target=user_loop, daemon=True) for _ in range(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def summarize(results: List[Dict], elapsed: float) -> Dict:
+    latencies = [r['latency_ms'] for r in results if r['ok']]
+    errors = {}
+    for r in results:
+        if not r['ok']:
+            errors[r['error']] = errors.get(r['error'], 0) + 1
+    return {
+        'requests': len(results),
+        'throughput_rps': round(len(results) / elapsed, 2) if elapsed else 0.0,
+        'error_rate': round(sum(errors.values()) / len(results), 4) if results else 0.0,
+        'errors': errors,
+        'latency_ms_p50': round(percentile(latencies, 50), 1),
+        'latency_ms_p90': round(percentile(latencies, 90), 1),
+        'latency_ms_p99': round(percentile(latencies, 99), 1),
+        'latency_ms_max': round(max(latencies), 1) if latencies else 0.0
+    }
+
+
+def ramp(server: AppServer, args, questions: List[str]) -> Dict:
+    """Step up concurrent users and record where the deployment breaks."""
+    stages = []
+    breaking_point = None
+
+    for users in args.users:
+        started = time.perf_counter()
+        results = run_users(server, users, args.endpoint, questions, duration=args.stage_seconds)
+        stage = dict(users=users, **summarize(results, time.perf_counter() - started))
+        stage['worker_rss_mb'] = server.worker_rss_mb()
+        stages.append(stage)
+        print(f"users={users:>4}  rps={stage['throughput_rps']:>7}  p50={stage['latency_ms_p50']:>8}ms  "
+              f"p99={stage['latency_ms_p99']:>8}ms  errors={stage['error_rate']:.2%}  "
+              f"rss={stage['worker_rss_mb']}")
+
+        if stage['error_rate'] > args.max_error_rate or stage['latency_ms_p99'] > args.max_p99_ms:
+            breaking_point = users
+            print(f'Breaking point reached at {users} users')
+            break
+
+    return {'stages': stages, 'breaking_point_users': breaking_point}
+
+
+def soak(server: AppServer, args, questions: List[str]) -> Dict:
+    """Hold a steady load for many requests and check worker memory for growth."""
+    samples = [{'requests': 0, 'worker_rss_mb': server.worker_rss_mb()}]
+    next_sample = [args.sample_every]
+    sample_lock = threading.Lock()
+
+    def on_progress(count):
+        # Only one user samples at a time; the others skip rather than wait
+        if count < next_sample[0] or not sample_lock.acquire(blocking=False):
+            return
+        try:
+            if count >= next_sample[0]:
+                next_sample[0] = count + args.sample_every
+                samples.append({'requests': count, 'worker_rss_mb': server.worker_rss_mb()})
+        finally:
+            sample_lock.release()
+
+    started = time.perf_counter()
+    results = run_users(server, args.soak_users, args.endpoint, questions,
+                        total_requests=args.soak_requests, on_progress=on_progress)
+    summary = summarize(results, time.perf_counter() - started)
+
+    # Fit RSS growth over the second half, after caches and pools have filled
+    tail = samples[len(samples) // 2:]
+    xs = [s['requests'] for s in tail]
+    ys = [sum(s['worker_rss_mb'].values()) for s in tail]
+    slope = 0.0
+    if len(tail) >= 2 and len(set(xs)) > 1:
+        mean_x, mean_y = sum(xs) / len(xs), sum(ys) / len(ys)
+        slope = (sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+                 / sum((x - mean_x) ** 2 for x in xs))
+    growth = round(slope * 1000, 2)
+
+    summary.update({
+        'rss_samples': samples,
+        'rss_growth_mb_per_1000_requests': growth,
+        'leak_suspected': growth > args.leak_threshold_mb
+    })
+    print(f"Soak: {summary['requests']} requests, rps={summary['throughput_rps']}, "
+          f"errors={summary['error_rate']:.2%}, RSS growth={growth} MB/1000 requests"
+          + (' -- possible leak' if summary['leak_suspected'] else ''))
+    return summary
+
+
+def main():
+    """Load-test djrag_project under WSGI and ASGI against a local mock LLM."""
+    parser = argparse.ArgumentParser(description='Load and soak tests for djrag_project')
+    parser.add_argument('--servers', nargs='+', default=['wsgi', 'asgi'], choices=list(SERVER_COMMANDS))
+    parser.add_argument('--mode', choices=['ramp', 'soak'], default='ramp')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=4, help='Threads per WSGI worker')
+    parser.add_argument('--endpoint', default='/query/', help="'/query/' (HTML form) or '/api/query'")
+    parser.add_argument('--questions', default=os.path.join(project_root, 'data', 'eval', 'safebank_retrieval.jsonl'))
+    parser.add_argument('--ready-timeout', type=float, default=600)
+    # Ramp
+    parser.add_argument('--users', nargs='+', type=int, default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument('--stage-seconds', type=float, default=30)
+    parser.add_argument('--max-error-rate', type=float, default=0.05)
+    parser.add_argument('--max-p99-ms', type=float, default=30000)
+    # Soak
+    parser.add_argument('--soak-users', type=int, default=8)
+    parser.add_argument('--soak-requests', type=int, default=5000)
+    parser.add_argument('--sample-every', type=int, default=250)
+    parser.add_argument('--leak-threshold-mb', type=float, default=5.0,
+                        help='RSS growth per 1000 requests treated as a leak')
+    # Mock LLM
+    parser.add_argument('--llm-latency-ms', type=float, default=300)
+    parser.add_argument('--llm-jitter-ms', type=float, default=100)
+    parser.add_argument('--llm-token-delay-ms', type=float, default=20,
+                        help='Delay between streamed tokens; only applies with --llm-streaming')
+    parser.add_argument('--llm-streaming', action='store_true',
+                        help='Make the app stream completions from the mock (LLM_STREAMING=true)')
+    parser.add_argument('--llm-error-rate', type=float, default=0.0)
+    parser.add_argument('--llm-tokens-per-minute', type=int, default=0,
+                        help='Mock TPM limit with x-ratelimit-* headers and 429s (0 = unlimited)')
+    parser.add_argument('--report', default='load_test_report.json')
+    args = parser.parse_args()
+
+    questions = load_questions(args.questions)
+    mock = start_mock_server(settings=MockLLMSettings(
+        args.llm_latency_ms, args.llm_jitter_ms, args.llm_token_delay_ms, args.llm_error_rate,
+        args.llm_tokens_per_minute
+    ))
+    llm_base_url = f'http://127.0.0.1:{mock.server_port}'
+
+    report = {'settings': vars(args), 'runs': {}}
+    try:
+        for mode in args.servers:
+            server = AppServer(mode, args.host, args.port, args.workers, args.threads, llm_base_url,
+                               llm_streaming=args.llm_streaming)
+            try:
+                server.start(args.ready_timeout)
+                run = ramp(server, args, questions) if args.mode == 'ramp' else soak(server, args, questions)
+                report['runs'][mode] = run
+            finally:
+                server.stop()
+    finally:
+        mock.shutdown()
+
+    with open(args.report, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'\nReport written to: {args.report}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,212 @@
+import os
+import sys
+from typing import Any, Dict, List
+
+import faiss
+import numpy as np
+from langchain_community.vectorstores.utils import maximal_marginal_relevance
+from langchain_core.documents import Document
+
+# Setup imports
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.insert(0, project_root)
+
+from customer_support.modules.config import Config
+
+# Comparison operators for range filters on ISO date fields
+RANGE_OPERATORS = ('gte', 'lte', 'as_of')
+
+
+class FilterError(ValueError):
+    """Raised when metadata filters cannot be applied to the index."""
+
+
+class MetadataFilterIndex:
+    """Per-value bitmaps over FAISS ids so filtered searches skip other chunks before scoring."""
+
+    def __init__(self, vector_store, fields=None):
+        self.vector_store = vector_store
+        self.fields = tuple(fields or Config.FILTER_FIELDS)
+        self.ntotal = vector_store.index.ntotal
+        self.bitmaps: Dict[str, Dict[Any, np.ndarray]] = {field: {} for field in self.fields}
+
+        for faiss_id, doc_id in vector_store.index_to_docstore_id.items():
+            metadata = vector_store.docstore.search(doc_id).metadata
+            for field in self.fields:
+                value = metadata.get(field)
+                if value is None:
+                    continue
+                bitmap = self.bitmaps[field].setdefault(value, np.zeros(self.ntotal, dtype=bool))
+                bitmap[faiss_id] = True
+
+        print(f'Filter index built for {self.ntotal} chunks: '
+              + ', '.join(f'{field}={len(values)}' for field, values in self.bitmaps.items()))
+
+    def check(self, filters: Dict):
+        """Raise FilterError for filters this index cannot honour."""
+        for field, value in filters.items():
+            if field not in self.bitmaps:
+                raise FilterError(f'Unknown filter field: {field}')
+            if not self.bitmaps[field]:
+                # e.g. an index built before chunks carried this metadata
+                raise FilterError(f'No chunks in the index have a "{field}" value to filter on')
+            if isinstance(value, dict) and (not value or set(value) - set(RANGE_OPERATORS)):
+                raise FilterError(
+                    f'Range filter on "{field}" takes {", ".join(RANGE_OPERATORS)}'
+                )
+
+    def _range_mask(self, field: str, bounds: Dict) -> np.ndarray:
+        """OR the bitmaps of every value within the bounds (ISO dates compare as strings)."""
+        mask = np.zeros(self.ntotal, dtype=bool)
+        for value, bitmap in self.bitmaps[field].items():
+            if 'gte' in bounds and str(value) < bounds['gte']:
+                continue
+            if 'lte' in bounds and str(value) > bounds['lte']:
+                continue
+            mask |= bitmap
+
+        if 'as_of' in bounds:
+            mask &= self._as_of_mask(field, bounds['as_of'])
+        return mask
+
+    def _as_of_mask(self, field: str, date: str) -> np.ndarray:
+        """Chunks of the newest version of each document in effect on `date`."""
+        mask = np.zeros(self.ntotal, dtype=bool)
+        documents = self.bitmaps.get('document') or {None: np.ones(self.ntotal, dtype=bool)}
+        for document_bitmap in documents.values():
+            in_effect = [
+                (value, bitmap) for value, bitmap in self.bitmaps[field].items()
+                if str(value) <= date and (bitmap & document_bitmap).any()
+            ]
+            if in_effect:
+                _, bitmap = max(in_effect, key=lambda item: str(item[0]))
+                mask |= bitmap & document_bitmap
+        return mask
+
+    def select(self, filters: Dict) -> np.ndarray:
+        """
+        Combine bitmaps for the given filters.
+
+        Values within a field are OR-ed (a list matches any of its values),
+        fields are AND-ed. A dict value is a range over ISO dates, e.g.
+        {'effective_date': {'as_of': '2024-06-01'}} keeps the newest version
+        of each document in effect on that date, and {'gte': ..., 'lte': ...}
+        keeps every version within the bounds.
+
+        Args:
+            filters: Mapping of field to value, list of values or range
+
+        Returns:
+            Boolean mask over FAISS ids
+        """
+        self.check(filters)
+        mask = np.ones(self.ntotal, dtype=bool)
+        for field, value in filters.items():
+            if isinstance(value, dict):
+                mask &= self._range_mask(field, value)
+                continue
+
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            field_mask = np.zeros(self.ntotal, dtype=bool)
+            for item in values:
+                bitmap = self.bitmaps[field].get(item)
+                if bitmap is not None:
+                    field_mask |= bitmap
+            mask &= field_mask
+        return mask
+
+    def search(self, query: str, k: int, filters: Dict) -> List[Document]:
+        """
+        Top-k search restricted to chunks matching `filters`.
+
+        Args:
+            query: Search query
+            k: Number of chunks to return
+            filters: Mapping of field to value or list of values
+
+        Returns:
+            List of matching Documents, best first
+        """
+        vector = self.vector_store.embedding_function.embed_query(query)
+        return self.search_by_vectors([vector], k, filters)[0]
+
+    def search_by_vectors(self, vectors, k: int, filters: Dict) -> List[List[Document]]:
+        """Filtered top-k search for a batch of query vectors in one FAISS call."""
+        mask = self.select(filters)
+        count = int(mask.sum())
+        if count == 0:
+            return [[] for _ in vectors]
+
+        # Only ids set in the bitmap are scored by FAISS
+        packed = np.packbits(mask, bitorder='little')
+        selector = faiss.IDSelectorBitmap(len(packed), faiss.swig_ptr(packed))
+        params = faiss.SearchParameters(sel=selector)
+        return search_by_vectors(self.vector_store, vectors, min(k, count), params=params)
+
+
+def search_by_vectors(vector_store, vectors, k: int, params=None) -> List[List[Document]]:
+    """
+    Top-k search for a batch of query vectors in one FAISS call.
+
+    Args:
+        vector_store: FAISS vector store
+        vectors: Query embeddings
+        k: Number of chunks per query
+        params: Optional faiss.SearchParameters (e.g. an ID selector)
+
+    Returns:
+        One list of Documents per query, best first
+    """
+    matrix = np.array(vectors, dtype='float32')
+    if vector_store._normalize_L2:
+        faiss.normalize_L2(matrix)
+
+    if params is None:
+        _, ids = vector_store.index.search(matrix, k)
+    else:
+        _, ids = vector_store.index.search(matrix, k, params=params)
+
+    docstore = vector_store.docstore
+    index_to_docstore_id = vector_store.index_to_docstore_id
+    return [
+        [docstore.search(index_to_docstore_id[int(i)]) for i in row if i != -1]
+        for row in ids
+    ]
+
+
+def mmr_search_by_vector(vector_store, vector, k: int, fetch_k: int,
+                         lambda_mult: float = 0.5) -> List[Document]:
+    """
+    Re-rank the top `fetch_k` chunks for diversity and return `k` of them.
+
+    Unlike FAISS.max_marginal_relevance_search_by_vector, ids FAISS could
+    not fill (-1, e.g. an IVF probe finding fewer than fetch_k vectors) are
+    dropped before reconstructing candidates.
+
+    Args:
+        vector_store: FAISS vector store (IVF indexes need a direct map)
+        vector: Query embedding
+        k: Number of chunks to return
+        fetch_k: Number of candidates to re-rank
+        lambda_mult: 1 favours relevance, 0 favours diversity
+
+    Returns:
+        List of Documents in MMR order
+    """
+    query = np.array([vector], dtype='float32')
+    if vector_store._normalize_L2:
+        faiss.normalize_L2(query)
+
+    _, ids = vector_store.index.search(query, fetch_k)
+    candidates = [int(i) for i in ids[0] if i != -1]
+    if not candidates:
+        return []
+
+    embeddings = [vector_store.index.reconstruct(i) for i in candidates]
+    selected = maximal_marginal_relevance(query[0], embeddings, k=min(k, len(candidates)),
+                                          lambda_mult=lambda_mult)
+
+    docstore = vector_store.docstore
+    index_to_docstore_id = vector_store.index_to_docstore_id
+    return [docstore.search(index_to_docstore_id[candidates[j]]) for j in selected]
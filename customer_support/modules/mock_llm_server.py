@@ -0,0 +1,222 @@
+import argparse
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Tuple
+
+
+class MockLLMSettings:
+    """Behaviour of the mock server."""
+
+    def __init__(self, latency_ms: float = 300, jitter_ms: float = 100, token_delay_ms: float = 20,
+                 error_rate: float = 0.0, tokens_per_minute: int = 0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.token_delay_ms = token_delay_ms
+        self.error_rate = error_rate
+        self.tokens_per_minute = tokens_per_minute
+
+
+class TokenWindow:
+    """Tokens spent in the current one-minute window, like a provider's TPM limit."""
+
+    def __init__(self, tokens_per_minute: int):
+        self.tokens_per_minute = tokens_per_minute
+        self._lock = threading.Lock()
+        self.window_start = time.monotonic()
+        self.used = 0
+
+    def spend(self, tokens: int) -> Tuple[bool, int, float]:
+        """
+        Spend tokens if the window has room.
+
+        Returns:
+            Tuple of (allowed, remaining tokens, seconds until the window resets)
+        """
+        with self._lock:
+            now = time.monotonic()
+            if now - self.window_start >= 60:
+                self.window_start, self.used = now, 0
+            allowed = self.used + tokens <= self.tokens_per_minute
+            if allowed:
+                self.used += tokens
+            reset = 60 - (now - self.window_start)
+            return allowed, self.tokens_per_minute - self.used, reset
+
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    """OpenAI/Groq-compatible chat completions with configurable latency and streaming."""
+
+    protocol_version = 'HTTP/1.1'
+    settings = MockLLMSettings()
+    window = None
+    answer = ('Thank you for contacting SafeBank. Based on the manual, you can do this '
+              'in the app under My Account. Contact support if you need more help.')
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, body: Dict, headers: Dict = None):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _rate_limit_headers(self, remaining: int, reset: float) -> Dict:
+        return {
+            'x-ratelimit-limit-tokens': str(self.settings.tokens_per_minute),
+            'x-ratelimit-remaining-tokens': str(remaining),
+            'x-ratelimit-reset-tokens': f'{reset:.2f}s'
+        }
+
+    def do_GET(self):
+        if self.path.rstrip('/').endswith('/models'):
+            self._send_json(200, {'object': 'list', 'data': [{'id': 'mock-model', 'object': 'model'}]})
+        else:
+            self._send_json(404, {'error': {'message': 'Not found'}})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        body = json.loads(self.rfile.read(length) or b'{}')
+
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self._send_json(404, {'error': {'message': 'Not found'}})
+            return
+
+        if random.random() < self.settings.error_rate:
+            self._send_json(429, {'error': {'message': 'Rate limit reached (mock)'}},
+                            {'retry-after': '1'})
+            return
+
+        prompt_chars = sum(len(str(m.get('content', ''))) for m in body.get('messages', []))
+        words = self.answer.split(' ')
+        usage = {
+            'prompt_tokens': prompt_chars // 4,
+            'completion_tokens': len(words),
+            'total_tokens': prompt_chars // 4 + len(words)
+        }
+
+        headers = {}
+        if self.window is not None:
+            allowed, remaining, reset = self.window.spend(usage['total_tokens'])
+            headers = self._rate_limit_headers(remaining, reset)
+            if not allowed:
+                self._send_json(429, {'error': {'message': 'Tokens per minute exceeded (mock)'}},
+                                dict(headers, **{'retry-after': str(math.ceil(reset))}))
+                return
+
+        delay = self.settings.latency_ms + random.uniform(-1, 1) * self.settings.jitter_ms
+        time.sleep(max(0.0, delay) / 1000)
+        completion_id = f'chatcmpl-{uuid.uuid4().hex}'
+        model = body.get('model', 'mock-model')
+
+        if body.get('stream'):
+            self._stream(completion_id, model, words, headers)
+            return
+
+        self._send_json(200, {
+            'id': completion_id,
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': model,
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': self.answer},
+                'finish_reason': 'stop'
+            }],
+            'usage': usage
+        }, headers)
+
+    def _stream(self, completion_id: str, model: str, words, headers: Dict):
+        """Server-sent events, one word per chunk."""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+
+        def write(data: str):
+            chunk = f'data: {data}\n\n'.encode()
+            self.wfile.write(f'{len(chunk):x}\r\n'.encode() + chunk + b'\r\n')
+            self.wfile.flush()
+
+        for i, word in enumerate(words):
+            content = word if i == 0 else f' {word}'
+            write(json.dumps({
+                'id': completion_id,
+                'object': 'chat.completion.chunk',
+                'created': int(time.time()),
+                'model': model,
+                'choices': [{'index': 0, 'delta': {'content': content}, 'finish_reason': None}]
+            }))
+            time.sleep(self.settings.token_delay_ms / 1000)
+
+        write(json.dumps({
+            'id': completion_id,
+            'object': 'chat.completion.chunk',
+            'created': int(time.time()),
+            'model': model,
+            'choices': [{'index': 0, 'delta': {}, 'finish_reason': 'stop'}]
+        }))
+        write('[DONE]')
+        self.wfile.write(b'0\r\n\r\n')
+
+
+def start_mock_server(host: str = '127.0.0.1', port: int = 0,
+                      settings: MockLLMSettings = None) -> ThreadingHTTPServer:
+    """
+    Start the mock server in a background thread.
+
+    Args:
+        host: Interface to bind
+        port: Port to bind (0 picks a free one)
+        settings: Latency, streaming, error and tokens-per-minute behaviour
+
+    Returns:
+        Running server; its base URL is http://host:server.server_port
+    """
+    settings = settings or MockLLMSettings()
+    handler = type('ConfiguredMockLLMHandler', (MockLLMHandler,), {
+        'settings': settings,
+        'window': TokenWindow(settings.tokens_per_minute) if settings.tokens_per_minute else None
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='mock-llm', daemon=True).start()
+    print(f'Mock LLM server listening on http://{host}:{server.server_port}')
+    return server
+
+
+def main():
+    """Run the mock server in the foreground (point GROQ_API_BASE at it)."""
+    parser = argparse.ArgumentParser(description='Mock OpenAI/Groq-compatible LLM server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8899)
+    parser.add_argument('--latency-ms', type=float, default=300)
+    parser.add_argument('--jitter-ms', type=float, default=100)
+    parser.add_argument('--token-delay-ms', type=float, default=20)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--tokens-per-minute', type=int, default=0)
+    args = parser.parse_args()
+
+    settings = MockLLMSettings(args.latency_ms, args.jitter_ms, args.token_delay_ms,
+                               args.error_rate, args.tokens_per_minute)
+    server = start_mock_server(args.host, args.port, settings)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,7 @@
 import os
+import re
 import sys
+import time
 from typing import Dict, List, Optional
 
 # Setup imports
@@ -8,35 +10,40 @@ project_root = os.path.dirname(os.path.dirname(current_dir))
 sys.path.insert(0, project_root)
 
 from customer_support.modules.config import Config
+from customer_support.modules.llm_client import get_llm_client, llm_priority
+from customer_support.modules.metadata_index import FilterError
 from langchain_groq import ChatGroq
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_core.runnables import RunnablePassthrough
+from langchain_core.runnables import RunnableLambda, RunnablePassthrough
 from langchain_core.messages import AIMessage, HumanMessage
 from langchain.chains.history_aware_retriever import create_history_aware_retriever
 from langchain.chains.retrieval import create_retrieval_chain
 from langchain_core.vectorstores import VectorStoreRetriever
 from langchain.chains.combine_documents.stuff import create_stuff_documents_chain
 
+# Shown instead of the upstream error when no answer could be generated
+UNAVAILABLE_ANSWER = "Sorry, I can't answer right now. Please try again in a moment."
+
 
 class RAGPipeline:
     """RAG pipeline for customer queries."""
     
-    def __init__(self, retriever: VectorStoreRetriever):
+    def __init__(self, retriever: VectorStoreRetriever, faq_index=None, llm=None):
         print("Initializing RAG Pipeline...")
         self.retriever = retriever
-        self.llm = self._init_llm()
+        self.faq_index = faq_index
+        # Pooled, rate-limited client shared by every pipeline in the process
+        self.llm_client = get_llm_client()
+        # An explicit llm (e.g. a fake model for offline evaluation) skips Groq
+        self.llm = llm or self._init_llm()
         self.chain = self._create_chain()
         print("RAG Pipeline ready")
     
     def _init_llm(self) -> ChatGroq:
         """Initialize LLM with Groq."""
         print(f"Loading LLM: {Config.MODEL_NAME}")
-        return ChatGroq(
-            model=Config.MODEL_NAME,
-            temperature=Config.MODEL_TEMPERATURE,
-            api_key=Config.GROQ_API_KEY
-        )
+        return self.llm_client.chat_model()
     
     def _create_chain(self):
         """Create main RAG chain with chat history."""
@@ -63,10 +70,11 @@ class RAGPipeline:
             ('human', 'Q: {input}\n\nContext: {context}')
         ])
         
-        qa_chain = create_stuff_documents_chain(self.llm, qa_prompt)
+        # Kept for batch answering, which retrieves outside the chain
+        self.qa_chain = create_stuff_documents_chain(self.llm, qa_prompt)
         
         # Final chain
-        return create_retrieval_chain(history_retriever, qa_chain)
+        return create_retrieval_chain(history_retriever, self.qa_chain)
     
     def _create_simple_chain(self):
         """Simple chain without chat history."""
@@ -82,48 +90,244 @@ class RAGPipeline:
             | StrOutputParser()
         )
     
-    def query(self, question: str, chat_history: Optional[List] = None) -> Dict:
-        """Process user query."""
+    def _retrieval_config(self, filters: Optional[Dict]) -> Dict:
+        """
+        Runnable config that applies metadata filters to the retriever.
+        
+        Raises:
+            FilterError: If the retriever cannot apply the filters (a plain
+                VectorStoreRetriever would silently ignore them)
+        """
+        if not filters:
+            return {}
+        
+        retriever = getattr(self.retriever, 'default', self.retriever)
+        filter_index = getattr(retriever, 'filter_index', None)
+        if filter_index is None:
+            raise FilterError(
+                'Metadata filters need the parent-section retriever (CHUNKING_STRATEGY=structure)'
+            )
+        filter_index.check(filters)
+        return {'configurable': {'retrieval_filters': filters}}
+    
+    def _format_result(self, question: str, answer: str, context: List) -> Dict:
+        """Shape an answer and its context documents for callers."""
+        # Format sources
+        sources = []
+        for doc in context[:2]:
+            sources.append({
+                'content': doc.page_content[:150] + '...',
+                'metadata': doc.metadata
+            })
+        
+        return {
+            'question': question,
+            'answer': answer,
+            'sources': sources,
+            'source_count': len(context)
+        }
+    
+    def _faq_result(self, question: str, match: Dict) -> Dict:
+        """Shape an FAQ match as a query result."""
+        return {
+            'question': question,
+            'answer': match['answer'],
+            'sources': [{
+                'content': match['answer'][:150] + '...',
+                'metadata': dict(match['metadata'], faq_question=match['question'], score=match['score'])
+            }],
+            'source_count': 1
+        }
+    
+    def _embed_question(self, question: str) -> List[float]:
+        """Embed a question with the model shared by the FAQ index and retriever."""
+        retriever = getattr(self.retriever, 'default', self.retriever)
+        if hasattr(retriever, 'embed_queries'):
+            return retriever.embed_queries([question])[0]
+        return self.faq_index.embeddings.embed_query(question)
+    
+    def _retrieve_by_vector(self, vector: List[float]) -> Optional[List]:
+        """Unfiltered retrieval from an existing embedding, or None if unsupported."""
+        retriever = getattr(self.retriever, 'default', self.retriever)
+        if hasattr(retriever, 'batch_retrieve'):
+            return retriever.batch_retrieve([vector], {})[0]
+        if isinstance(retriever, VectorStoreRetriever) and retriever.search_type == 'similarity':
+            return retriever.vectorstore.similarity_search_by_vector(vector, **retriever.search_kwargs)
+        return None
+    
+    def faq_answer(self, question: str, vector: Optional[List[float]] = None) -> Optional[Dict]:
+        """Extractive answer from the FAQ index, skipping the LLM."""
+        if vector is None:
+            match = self.faq_index.match(question)
+        else:
+            match = self.faq_index.match_vectors([question], [vector])[0]
+        if match is None:
+            return None
+        return self._faq_result(question, match)
+    
+    def query(self, question: str, chat_history: Optional[List] = None,
+              filters: Optional[Dict] = None) -> Dict:
+        """
+        Process user query.
+        
+        Args:
+            question: User question
+            chat_history: Previous messages
+            filters: Metadata filters, e.g. {'product': 'cards', 'locale': ['en', 'en-GB'],
+                'effective_date': {'as_of': '2024-06-01'}}
+        
+        Returns:
+            Answer with its sources; if the LLM is unavailable, a generic
+            answer with the upstream failure in 'error'
+        
+        Raises:
+            FilterError: If the filters cannot be applied to this index
+        """
         chat_history = chat_history or []
         print(f"Query: {question[:40]}...")
         
+        # Raised to the caller: falling back would answer without the filters
+        config = self._retrieval_config(filters)
+        
+        # Follow-up questions need history-aware reformulation and FAQ
+        # entries carry no product metadata, so only unfiltered standalone
+        # questions take the FAQ fast path
+        vector = None
+        if (self.faq_index is not None and Config.FAQ_FAST_PATH_ENABLED
+                and not chat_history and not filters):
+            vector = self._embed_question(question)
+            result = self.faq_answer(question, vector)
+            if result is not None:
+                return result
+        
         try:
+            # On an FAQ miss, retrieve with the embedding we already have
+            context = self._retrieve_by_vector(vector) if vector is not None else None
+            if context is not None:
+                answer = self.qa_chain.invoke({
+                    'input': question,
+                    'context': context,
+                    'chat_history': []
+                })
+                return self._format_result(question, answer, context)
+            
             result = self.chain.invoke({
                 'input': question, 
                 'chat_history': chat_history
-            })
-            
-            answer = result.get('answer', '')
-            context = result.get('context', [])
-            
-            # Format sources
-            sources = []
-            for doc in context[:2]:
-                sources.append({
-                    'content': doc.page_content[:150] + '...',
-                    'metadata': doc.metadata
-                })
+            }, config=config)
             
-            return {
-                'question': question,
-                'answer': answer,
-                'sources': sources,
-                'source_count': len(context)
-            }
+            return self._format_result(question, result.get('answer', ''), result.get('context', []))
             
         except Exception as e:
             print(f"Error: {e}")
-            return {
-                'question': question,
-                'answer': self.simple_query(question),
-                'sources': [],
-                'source_count': 0
-            }
-    
-    def simple_query(self, question: str) -> str:
+        
+        try:
+            answer = self._create_simple_chain().invoke(question, config=config)
+            error = None
+        except Exception as e:
+            # Callers decide what to show; the upstream message stays out of the answer
+            print(f"Fallback failed: {e}")
+            answer, error = UNAVAILABLE_ANSWER, str(e)
+        
+        result = {'question': question, 'answer': answer, 'sources': [], 'source_count': 0}
+        if error is not None:
+            result['error'] = error
+        return result
+    
+    @staticmethod
+    def _normalize_question(question: str) -> str:
+        """Key used to deduplicate questions in a batch."""
+        return re.sub(r'\s+', ' ', question).strip().casefold()
+    
+    def _timed_answer(self, inputs: Dict) -> Dict:
+        """Run the answer chain for one batch item and time it."""
+        started = time.perf_counter()
+        answer = self.qa_chain.invoke(inputs)
+        return {'answer': answer, 'llm_ms': (time.perf_counter() - started) * 1000}
+    
+    def batch_query(self, questions: List[str], filters: Optional[Dict] = None,
+                    max_concurrency: Optional[int] = None) -> List[Dict]:
+        """
+        Answer many standalone questions for offline workloads.
+        
+        Questions are deduplicated, embedded and retrieved in one vectorized
+        pass, FAQ matches skip the LLM, and the remaining LLM calls run at
+        'batch' priority with bounded concurrency.
+        
+        Args:
+            questions: Questions to answer
+            filters: Metadata filters applied to every question
+            max_concurrency: Concurrent LLM calls (defaults to Config.BATCH_MAX_CONCURRENCY)
+            
+        Returns:
+            One result per input question, in order, with per-item timing
+        """
+        max_concurrency = max_concurrency or Config.BATCH_MAX_CONCURRENCY
+        config = self._retrieval_config(filters)
+        
+        unique = {}
+        for question in questions:
+            unique.setdefault(self._normalize_question(question), question)
+        texts = list(unique.values())
+        print(f"Batch query: {len(questions)} questions, {len(texts)} unique")
+        
+        # Vectorized embedding, FAQ matching and retrieval
+        started = time.perf_counter()
+        retriever = getattr(self.retriever, 'default', self.retriever)
+        vectorized = hasattr(retriever, 'batch_retrieve')
+        vectors = retriever.embed_queries(texts) if vectorized else None
+        
+        matches = [None] * len(texts)
+        if self.faq_index is not None and Config.FAQ_FAST_PATH_ENABLED and not filters:
+            if vectors is None:
+                matches = [self.faq_index.match(text) for text in texts]
+            else:
+                matches = self.faq_index.match_vectors(texts, vectors)
+        
+        pending = [i for i, match in enumerate(matches) if match is None]
+        if not pending:
+            contexts = []
+        elif vectorized:
+            contexts = retriever.batch_retrieve([vectors[i] for i in pending], filters)
+        else:
+            contexts = self.retriever.batch([texts[i] for i in pending], config=config)
+        retrieval_ms = (time.perf_counter() - started) * 1000 / max(len(texts), 1)
+        
+        # Bounded-concurrency LLM calls
+        inputs = [
+            {'input': texts[i], 'context': context, 'chat_history': []}
+            for i, context in zip(pending, contexts)
+        ]
+        with llm_priority('batch'):
+            answers = RunnableLambda(self._timed_answer).batch(
+                inputs, config={'max_concurrency': max_concurrency}, return_exceptions=True
+            )
+        
+        results = [None] * len(texts)
+        for i, match in enumerate(matches):
+            if match is not None:
+                results[i] = dict(self._faq_result(texts[i], match), timing={
+                    'retrieval_ms': round(retrieval_ms, 2), 'llm_ms': 0.0
+                })
+        
+        for i, context, answer in zip(pending, contexts, answers):
+            if isinstance(answer, Exception):
+                result = self._format_result(texts[i], '', context)
+                result['error'] = str(answer)
+                llm_ms = 0.0
+            else:
+                result = self._format_result(texts[i], answer['answer'], context)
+                llm_ms = answer['llm_ms']
+            result['timing'] = {'retrieval_ms': round(retrieval_ms, 2), 'llm_ms': round(llm_ms, 2)}
+            results[i] = result
+        
+        by_key = dict(zip(unique.keys(), results))
+        return [dict(by_key[self._normalize_question(q)], question=q) for q in questions]
+    
+    def simple_query(self, question: str, filters: Optional[Dict] = None) -> str:
         """Simple query without history."""
         try:
-            return self._create_simple_chain().invoke(question)
+            return self._create_simple_chain().invoke(question, config=self._retrieval_config(filters))
         except Exception as e:
             return f"Error: {str(e)}"
 
@@ -147,7 +351,10 @@ def main():
         pdf_path = os.path.join(project_root, 'data', 'safebank-manual.pdf')
         
         # Process PDF
-        chunks = processor.process_pdf_file(pdf_path)
+        if Config.CHUNKING_STRATEGY == 'structure':
+            chunks = processor.process_pdf_structured(pdf_path)
+        else:
+            chunks = processor.process_pdf_file(pdf_path)
         vector_store = vs_manager.create_vector_store(chunks[:30])
         retriever = vs_manager.create_retriever(vector_store)
         
@@ -0,0 +1,312 @@
+import argparse
+import csv
+import itertools
+import json
+import os
+import re
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import faiss
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import FakeListChatModel
+
+# Setup imports
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.insert(0, project_root)
+
+from customer_support.modules.config import Config
+from customer_support.modules.document_processor import DocumentProcessor
+from customer_support.modules.llm_client import estimate_prompt_tokens
+from customer_support.modules.rag_pipeline import RAGPipeline
+from customer_support.modules.vector_store import ParentSectionRetriever, VectorStoreManager
+
+WORD = re.compile(r'\w+')
+
+
+def load_eval_set(path: str) -> List[Dict]:
+    """
+    Load labeled questions from JSONL.
+
+    Each line: {"question": "...", "relevant": ["passage", ...]}
+    """
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def passage_found(passage: str, document: Document) -> bool:
+    """A passage counts as retrieved when most of its words are in the document."""
+    passage_words = set(WORD.findall(passage.lower()))
+    if not passage_words:
+        return False
+    document_words = set(WORD.findall(document.page_content.lower()))
+    overlap = len(passage_words & document_words) / len(passage_words)
+    return overlap >= Config.EVAL_MATCH_THRESHOLD
+
+
+def calibrate_faq_index(faq_index, eval_set: List[Dict]) -> Optional[float]:
+    """
+    Set the FAQ fast-path threshold from labeled questions.
+
+    An FAQ answer is correct for a question when it contains one of the
+    question's relevant passages.
+
+    Returns:
+        The calibrated min_score, or None if it was left unchanged
+    """
+    vectors = faq_index.embeddings.embed_documents([item['question'] for item in eval_set])
+
+    def is_correct(number: int, entry: Dict) -> bool:
+        answer = Document(page_content=entry['answer'])
+        return any(passage_found(passage, answer) for passage in eval_set[number]['relevant'])
+
+    return faq_index.calibrate(vectors, is_correct)
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Reuses question embeddings across every configuration in the sweep.
+
+    The time of each question's one uncached embed is kept in `embed_ms`,
+    so reported retrieval latency still includes embedding the query.
+    """
+
+    def __init__(self, embeddings: Embeddings):
+        self.embeddings = embeddings
+        self.queries = {}
+        self.embed_ms = {}
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        if text not in self.queries:
+            started = time.perf_counter()
+            self.queries[text] = self.embeddings.embed_query(text)
+            self.embed_ms[text] = (time.perf_counter() - started) * 1000
+        return self.queries[text]
+
+
+class EvalCallback(BaseCallbackHandler):
+    """Captures retrieval latency and prompt size of one chain run."""
+
+    def __init__(self):
+        self.retrieval_started = {}
+        self.retrieval_ms = 0.0
+        self.prompt_tokens = 0
+
+    def on_retriever_start(self, serialized, query, *, run_id, **kwargs):
+        self.retrieval_started[run_id] = time.perf_counter()
+
+    def on_retriever_end(self, documents, *, run_id, **kwargs):
+        started = self.retrieval_started.pop(run_id, None)
+        if started is not None:
+            self.retrieval_ms += (time.perf_counter() - started) * 1000
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        self.prompt_tokens += sum(estimate_prompt_tokens(batch) for batch in messages)
+
+
+def rebuild_index(vector_store, index_type: str):
+    """Return a copy of the vector store backed by a different FAISS index type."""
+    if index_type == 'flat':
+        return vector_store
+
+    flat = vector_store.index
+    vectors = flat.reconstruct_n(0, flat.ntotal)
+    dimension = flat.d
+
+    if index_type == 'hnsw':
+        index = faiss.IndexHNSWFlat(dimension, 32)
+    elif index_type == 'ivf':
+        nlist = max(1, min(int(flat.ntotal ** 0.5), flat.ntotal // 39))
+        index = faiss.IndexIVFFlat(faiss.IndexFlatL2(dimension), dimension, nlist)
+        index.train(vectors)
+        index.nprobe = max(1, nlist // 4)
+    else:
+        raise ValueError(f'Unknown index type: {index_type}')
+    index.add(vectors)
+    if index_type == 'ivf':
+        # MMR re-ranking reconstructs candidate vectors by id
+        index.make_direct_map()
+
+    copy = vector_store.__class__(
+        vector_store.embedding_function,
+        index,
+        vector_store.docstore,
+        vector_store.index_to_docstore_id
+    )
+    return copy
+
+
+def evaluate(pipeline: RAGPipeline, eval_set: List[Dict], embed_ms: Dict = None) -> Dict:
+    """
+    Run every labeled question through the pipeline and score retrieval.
+
+    Args:
+        pipeline: Pipeline under test
+        eval_set: Labeled questions
+        embed_ms: Uncached embedding time per question, added to retrieval
+            latency because the sweep serves query embeddings from a cache
+    """
+    embed_ms = embed_ms or {}
+    recalls, reciprocal_ranks, prompt_tokens, latencies = [], [], [], []
+
+    for item in eval_set:
+        callback = EvalCallback()
+        result = pipeline.chain.invoke(
+            {'input': item['question'], 'chat_history': []},
+            config={'callbacks': [callback]}
+        )
+        documents = result.get('context', [])
+
+        relevant = item['relevant']
+        found = [p for p in relevant if any(passage_found(p, doc) for doc in documents)]
+        recalls.append(len(found) / len(relevant) if relevant else 0.0)
+
+        rank = next(
+            (i for i, doc in enumerate(documents, 1) if any(passage_found(p, doc) for p in relevant)),
+            None
+        )
+        reciprocal_ranks.append(1 / rank if rank else 0.0)
+        prompt_tokens.append(callback.prompt_tokens)
+        latencies.append(callback.retrieval_ms + embed_ms.get(item['question'], 0.0))
+
+    latencies.sort()
+    return {
+        'recall': round(statistics.mean(recalls), 3),
+        'mrr': round(statistics.mean(reciprocal_ranks), 3),
+        'prompt_tokens': round(statistics.mean(prompt_tokens), 1),
+        'retrieval_ms_p50': round(latencies[len(latencies) // 2], 2),
+        'retrieval_ms_p95': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 2)
+    }
+
+
+def sweep_chunking(chunking: Dict, grid: Dict, eval_set: List[Dict],
+                   embeddings: CachedEmbeddings, pdf_path: str) -> List[Dict]:
+    """Embed one chunking configuration and evaluate every index/k/parent_k/rerank setting on it."""
+    processor = DocumentProcessor(chunking['chunk_size'], chunking['chunk_overlap'])
+    if chunking['strategy'] == 'structure':
+        chunks = processor.process_pdf_structured(pdf_path)
+    else:
+        chunks = processor.process_pdf_file(pdf_path)
+
+    vs_manager = VectorStoreManager(embeddings=embeddings)
+    flat_store = vs_manager.create_vector_store(chunks)
+    # The fake model keeps the run offline; only the prompt it receives matters
+    fake_llm = FakeListChatModel(responses=['offline evaluation'])
+
+    results = []
+    for index_type in grid['index_types']:
+        try:
+            vector_store = rebuild_index(flat_store, index_type)
+        except Exception as e:
+            vector_store, index_error = None, f'{type(e).__name__}: {e}'
+
+        # Only structure chunks have parent sections to cap
+        parent_ks = grid['parent_ks'] if chunking['strategy'] == 'structure' else [None]
+        for rerank, k, parent_k in itertools.product(grid['reranks'], grid['ks'], parent_ks):
+            row = dict(chunking, chunks=len(chunks), index_type=index_type, rerank=rerank,
+                       k=k, parent_k=parent_k)
+            # One failing cell is recorded in its row instead of aborting the sweep
+            try:
+                if vector_store is None:
+                    raise RuntimeError(index_error)
+                retriever = ParentSectionRetriever(
+                    vector_store=vector_store,
+                    child_k=k,
+                    parent_k=parent_k or Config.PARENT_RETRIEVAL_K,
+                    search_type='mmr' if rerank == 'mmr' else 'similarity'
+                )
+                pipeline = RAGPipeline(retriever, llm=fake_llm)
+                row.update(evaluate(pipeline, eval_set, embeddings.embed_ms))
+            except Exception as e:
+                row['error'] = f'{type(e).__name__}: {e}'
+            results.append(row)
+            print(f'Evaluated: {row}')
+    return results
+
+
+def pick_cheapest(results: List[Dict], min_recall: float, min_mrr: float) -> Optional[Dict]:
+    """Cheapest configuration (prompt tokens, then latency) that meets the quality bar."""
+    passing = [
+        r for r in results
+        if 'error' not in r and r['recall'] >= min_recall and r['mrr'] >= min_mrr
+    ]
+    if not passing:
+        return None
+    return min(passing, key=lambda r: (r['prompt_tokens'], r['retrieval_ms_p50']))
+
+
+def main():
+    """Sweep retrieval settings over a labeled question set and report the trade-offs."""
+    parser = argparse.ArgumentParser(description='Offline retrieval evaluation')
+    parser.add_argument('--eval-set', default=os.path.join(project_root, 'data', 'eval', 'safebank_retrieval.jsonl'))
+    parser.add_argument('--pdf', default=os.path.join(project_root, 'data', 'safebank-manual.pdf'))
+    parser.add_argument('--strategies', nargs='+', default=['structure', 'recursive'])
+    parser.add_argument('--chunk-sizes', nargs='+', type=int, default=[300, 500, 800])
+    parser.add_argument('--chunk-overlaps', nargs='+', type=int, default=[50])
+    parser.add_argument('--ks', nargs='+', type=int, default=[3, 6, 10])
+    parser.add_argument('--parent-ks', nargs='+', type=int, default=[2, 3, 5],
+                        help='Parent sections kept per query (structure chunking only)')
+    parser.add_argument('--index-types', nargs='+', default=['flat', 'hnsw', 'ivf'])
+    parser.add_argument('--reranks', nargs='+', default=['none', 'mmr'])
+    parser.add_argument('--min-recall', type=float, default=0.9)
+    parser.add_argument('--min-mrr', type=float, default=0.0)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--output', default='retrieval_eval.csv')
+    args = parser.parse_args()
+
+    eval_set = load_eval_set(args.eval_set)
+    print(f'Loaded {len(eval_set)} labeled questions')
+
+    # Questions are embedded once, before the sweep threads start reading the cache
+    embeddings = CachedEmbeddings(VectorStoreManager().embeddings)
+    for item in eval_set:
+        embeddings.embed_query(item['question'])
+
+    grid = {'index_types': args.index_types, 'reranks': args.reranks, 'ks': args.ks,
+            'parent_ks': args.parent_ks}
+    chunkings = [
+        {'strategy': strategy, 'chunk_size': size, 'chunk_overlap': overlap}
+        for strategy, size, overlap in itertools.product(args.strategies, args.chunk_sizes, args.chunk_overlaps)
+    ]
+
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        futures = [
+            executor.submit(sweep_chunking, chunking, grid, eval_set, embeddings, args.pdf)
+            for chunking in chunkings
+        ]
+        results = []
+        for chunking, future in zip(chunkings, futures):
+            try:
+                results.extend(future.result())
+            except Exception as e:
+                # e.g. the PDF failed to chunk with these settings
+                print(f'Chunking {chunking} failed: {e}')
+                results.append(dict(chunking, error=f'{type(e).__name__}: {e}'))
+
+    columns = ['strategy', 'chunk_size', 'chunk_overlap', 'chunks', 'index_type', 'rerank', 'k', 'parent_k',
+               'recall', 'mrr', 'prompt_tokens', 'retrieval_ms_p50', 'retrieval_ms_p95', 'error']
+    with open(args.output, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=columns, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(results)
+    print(f'\nWrote {len(results)} configurations to: {args.output}')
+
+    best = pick_cheapest(results, args.min_recall, args.min_mrr)
+    if best:
+        print(f'Cheapest configuration meeting recall>={args.min_recall}, mrr>={args.min_mrr}:')
+        print({column: best.get(column) for column in columns})
+    else:
+        print('No configuration meets the quality bar')
+
+
+if __name__ == '__main__':
+    main()
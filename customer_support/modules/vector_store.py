@@ -1,8 +1,12 @@
 import os
 import sys
-from typing import List
+from typing import Any, Dict, List, Optional, Union
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_community.vectorstores import FAISS
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever, RetrieverLike
+from langchain_core.runnables import ConfigurableField
 from langchain_core.vectorstores import VectorStoreRetriever
 import shutil
 
@@ -14,56 +18,164 @@ sys.path.insert(0, project_root)
 
 # Import Config
 from customer_support.modules.config import Config
+from customer_support.modules.metadata_index import (
+    FilterError, MetadataFilterIndex, mmr_search_by_vector, search_by_vectors
+)
+from customer_support.modules.index_versions import IndexVersionStore
+from customer_support.modules.faq_index import FAQIndex
+
+class ParentSectionRetriever(BaseRetriever):
+    """Searches small child chunks but returns their parent sections."""
+    
+    vector_store: Any
+    child_k: int = Config.RETRIEVAL_K
+    parent_k: int = Config.PARENT_RETRIEVAL_K
+    search_type: str = Config.RETRIEVAL_TYPE  # 'similarity' or 'mmr'
+    search_kwargs: Dict = {}
+    filter_index: Any = None
+    filters: Dict = {}
+    
+    def expand_to_parents(self, children: List[Document]) -> List[Document]:
+        """Replace child chunks with their (deduplicated) parent sections."""
+        documents = []
+        seen = set()
+        for child in children:
+            parent_id = child.metadata.get('parent_id')
+            if parent_id is None:
+                # Stores built without structure chunking have no parents
+                documents.append(child)
+                continue
+            if parent_id in seen or len(seen) >= self.parent_k:
+                continue
+            seen.add(parent_id)
+            
+            metadata = {k: v for k, v in child.metadata.items() if k != 'parent_content'}
+            documents.append(Document(page_content=child.metadata['parent_content'], metadata=metadata))
+        
+        return documents
+    
+    def require_filter_index(self) -> MetadataFilterIndex:
+        """Filtered searches must never silently fall back to unfiltered ones."""
+        if self.filter_index is None:
+            raise FilterError('This retriever has no metadata filter index')
+        return self.filter_index
+    
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        if self.filters:
+            children = self.require_filter_index().search(query, self.child_k, self.filters)
+        elif self.search_type == 'mmr':
+            # Re-rank a wider candidate set for diversity
+            vector = self.vector_store.embedding_function.embed_query(query)
+            children = mmr_search_by_vector(
+                self.vector_store, vector, k=self.child_k, fetch_k=self.child_k * 4, **self.search_kwargs
+            )
+        else:
+            children = self.vector_store.similarity_search(query, k=self.child_k, **self.search_kwargs)
+        return self.expand_to_parents(children)
+    
+    def embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """Embed many queries in one model call."""
+        # HuggingFaceEmbeddings embeds queries and documents the same way
+        return self.vector_store.embedding_function.embed_documents(queries)
+    
+    def batch_retrieve(self, vectors: List[List[float]], filters: Dict = None) -> List[List[Document]]:
+        """
+        Retrieve parent sections for a batch of query embeddings.
+        
+        Args:
+            vectors: Query embeddings from embed_queries
+            filters: Metadata filters (overrides self.filters)
+            
+        Returns:
+            One list of Documents per query
+        """
+        filters = filters if filters is not None else self.filters
+        if filters:
+            batches = self.require_filter_index().search_by_vectors(vectors, self.child_k, filters)
+        elif self.search_type == 'mmr':
+            batches = [
+                mmr_search_by_vector(
+                    self.vector_store, vector, k=self.child_k, fetch_k=self.child_k * 4, **self.search_kwargs
+                )
+                for vector in vectors
+            ]
+        else:
+            batches = search_by_vectors(self.vector_store, vectors, self.child_k)
+        return [self.expand_to_parents(children) for children in batches]
+
 
 class VectorStoreManager:
     """Manages vector store creation, saving, and loading."""
     
-    def __init__(self):
-        print(f'Loading embedding model: {Config.EMBEDDING_MODEL}')
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name=Config.EMBEDDING_MODEL
-        )
-        print('Embedding model loaded')
+    def __init__(self, embeddings: HuggingFaceEmbeddings = None):
+        if embeddings is not None:
+            # Reuse an already loaded model (e.g. when reloading the index)
+            self.embeddings = embeddings
+        else:
+            print(f'Loading embedding model: {Config.EMBEDDING_MODEL}')
+            self.embeddings = HuggingFaceEmbeddings(
+                model_name=Config.EMBEDDING_MODEL
+            )
+            print('Embedding model loaded')
+        self.loaded_version = None
+        self.loaded_path = None
         
-    def create_vector_store(self, chunks: List[str]) -> FAISS:
+    def create_vector_store(self, chunks: List[Union[str, Document]]) -> FAISS:
         """
         Create FAISS vector store from text chunks.
         
         Args:
-            chunks: List of text chunks
+            chunks: List of text chunks or chunk Documents (with metadata)
             
         Returns:
             FAISS vector store
         """
         print("Creating vector store from chunks...")
         
-        # Create FAISS index from texts
-        
-        vector_store = FAISS.from_texts(
-            texts=chunks,
-            embedding=self.embeddings
-        )
+        # Create FAISS index from texts, keeping metadata for Documents
+        if chunks and isinstance(chunks[0], Document):
+            vector_store = FAISS.from_documents(
+                documents=chunks,
+                embedding=self.embeddings
+            )
+        else:
+            vector_store = FAISS.from_texts(
+                texts=chunks,
+                embedding=self.embeddings
+            )
         
         print(f'Vector store created with {len(chunks)} chunks')
         
         return vector_store
     
     # Save vector store
-    def save_vector_store(self, vector_store: FAISS, save_path: str = None):
+    def save_vector_store(self, vector_store: FAISS, save_path: str = None, promote: bool = True,
+                          faq_index: FAQIndex = None) -> str:
         """
-        Save vector store to disk.
+        Save vector store to disk as a new index version.
         
         Args:
             vector_store: FAISS vector store
             save_path: Path to save the vector store
+            promote: Make the new version current once written
+            faq_index: FAQ index built from the same documents, saved in the version
+            
+        Returns:
+            Version id
         """
         
         if save_path is None:
             save_path = Config.VECTOR_STORE_PATH
             
         print(f'Saving vector store to: {save_path}')
-        vector_store.save_local(save_path)
+        store = IndexVersionStore(save_path)
+        version = store.write(vector_store, faq_index)
+        if promote:
+            store.promote(version)
         print('Vector store saved successfully')
+        return version
         
     # Load vector store
     def load_vector_store(self, load_path: str = None) -> FAISS:
@@ -85,17 +197,43 @@ class VectorStoreManager:
         if not os.path.exists(load_path):
             raise FileNotFoundError(f'Vector store not found at: {load_path}')
         
+        # Versioned stores load whatever CURRENT pointed to when we looked;
+        # plain directories from older builds load as-is
+        store = IndexVersionStore(load_path)
+        version = None
+        if store.is_versioned():
+            version = store.current_version()
+            store.verify(version)
+            load_path = store.version_path(version)
+        
         vector_store = FAISS.load_local(
             load_path,
             self.embeddings,
             allow_dangerous_deserialization=True # 
         )
+        self.loaded_version = version
+        self.loaded_path = load_path
         
-        print('Vector store loaded successfully')
+        print(f'Vector store loaded successfully (version: {version or "unversioned"})')
         return vector_store
     
+    def load_faq_index(self) -> Optional[FAQIndex]:
+        """
+        Load the FAQ index saved with the loaded index version.
+        
+        Returns:
+            FAQIndex, or None if the loaded version has none
+        """
+        if self.loaded_version is None:
+            return None
+        faq_path = os.path.join(self.loaded_path, 'faq')
+        if not os.path.exists(faq_path):
+            print(f'Index version {self.loaded_version} has no FAQ index')
+            return None
+        return FAQIndex.load(self.embeddings, faq_path)
+    
     # Create retriever
-    def create_retriever(self, vector_store: FAISS = None) -> VectorStoreRetriever:
+    def create_retriever(self, vector_store: FAISS = None) -> RetrieverLike:
         """
         Create a retriever from vector store.
         
@@ -103,7 +241,8 @@ class VectorStoreManager:
             vector_store: FAISS vector store (optional, loads if not provided)
             
         Returns:
-            VectorStoreRetriever
+            Filterable ParentSectionRetriever for structure-chunked stores,
+            else VectorStoreRetriever
         """
         
         # Load vector store
@@ -112,6 +251,22 @@ class VectorStoreManager:
         
         print('Creating retriever.....')
         
+        if Config.CHUNKING_STRATEGY == 'structure':
+            # Filters are set per call via config={'configurable': {'retrieval_filters': ...}}
+            retriever = ParentSectionRetriever(
+                vector_store=vector_store,
+                filter_index=MetadataFilterIndex(vector_store)
+            ).configurable_fields(
+                filters=ConfigurableField(
+                    id='retrieval_filters',
+                    name='Retrieval filters',
+                    description='Metadata filters applied before scoring'
+                )
+            )
+            print(f'Parent-section retriever created with k= {Config.RETRIEVAL_K} '
+                  f'(up to {Config.PARENT_RETRIEVAL_K} sections)')
+            return retriever
+        
         retirever = vector_store.as_retriever(
             search_type=Config.RETRIEVAL_TYPE,
             search_kwargs={'k': Config.RETRIEVAL_K}
@@ -136,7 +291,10 @@ if __name__=='__main__':
         project_root = os.path.dirname(os.path.dirname(current_dir))
         pdf_path = os.path.join(project_root, 'data', 'safebank-manual.pdf')
         
-        chunks = processor.process_pdf_file(pdf_path)
+        if Config.CHUNKING_STRATEGY == 'structure':
+            chunks = processor.process_pdf_structured(pdf_path)
+        else:
+            chunks = processor.process_pdf_file(pdf_path)
         
         # Create and save vector store
         vs_manager = VectorStoreManager()
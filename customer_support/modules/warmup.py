@@ -0,0 +1,150 @@
+import os
+import sys
+import threading
+import time
+from typing import Dict, Optional
+
+# Setup imports
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.insert(0, project_root)
+
+from customer_support.modules.config import Config
+
+
+class WarmupManager:
+    """Runs and tracks the warm-up of models, index and LLM connection."""
+
+    STAGES = ('embedder', 'index', 'llm')
+    # The LLM keep-alive only saves a TLS handshake, so it does not gate readiness
+    REQUIRED_STAGES = ('embedder', 'index')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stages = {stage: 'pending' for stage in self.STAGES}
+        self.error = None
+        self.attempts = 0
+        self.started_at = None
+        self.finished_at = None
+
+    def _set_stage(self, stage: str, state: str):
+        with self._lock:
+            self.stages[stage] = state
+
+    def warm_embedder(self, embeddings):
+        """Load the embedding weights by running a dummy embed."""
+        embeddings.embed_query(Config.WARMUP_QUERY)
+
+    def warm_index(self, vector_store):
+        """Page the FAISS index in with a dummy search."""
+        vector_store.similarity_search(Config.WARMUP_QUERY, k=1)
+
+    def warm_llm(self, http_client):
+        """Open a keep-alive connection to the LLM endpoint."""
+        response = http_client.get(
+            f'{Config.GROQ_API_BASE}/openai/v1/models',
+            headers={'Authorization': f'Bearer {Config.GROQ_API_KEY}'}
+        )
+        response.raise_for_status()
+
+    def _warm_stage(self, stage: str, parts):
+        rag, vs_manager, vector_store = parts
+        if stage == 'embedder':
+            self.warm_embedder(vs_manager.embeddings)
+        elif stage == 'index':
+            self.warm_index(vector_store)
+        else:
+            self.warm_llm(rag.llm_client.http_client)
+
+    def _attempt(self, pipeline_factory) -> bool:
+        """Warm every stage that is not ready yet; True when all are."""
+        try:
+            parts = pipeline_factory()
+        except Exception as e:
+            # Nothing can be warmed without the pipeline
+            print(f'Warm-up failed building pipeline: {e}')
+            self._set_stage('embedder', 'failed')
+            self.error = f'embedder: {e}'
+            return False
+
+        for stage in self.STAGES:
+            if self.stages[stage] == 'ready':
+                continue
+            self._set_stage(stage, 'running')
+            try:
+                self._warm_stage(stage, parts)
+                self._set_stage(stage, 'ready')
+            except Exception as e:
+                print(f'Warm-up failed at {stage}: {e}')
+                self._set_stage(stage, 'failed')
+                self.error = f'{stage}: {e}'
+
+        return all(state == 'ready' for state in self.stages.values())
+
+    def run(self, pipeline_factory) -> Dict:
+        """
+        Build the pipeline and warm every stage, retrying failed stages.
+
+        Transient failures (an LLM 5xx, an index still being written) are
+        retried with exponential backoff until every stage is warm or
+        WARMUP_MAX_SECONDS have passed.
+
+        Args:
+            pipeline_factory: Callable returning (pipeline, vs_manager, vector_store)
+
+        Returns:
+            Warm-up status report
+        """
+        print('Warming up RAG pipeline...')
+        self.started_at = time.time()
+        deadline = self.started_at + Config.WARMUP_MAX_SECONDS
+        delay = Config.WARMUP_RETRY_SECONDS
+
+        while True:
+            self.attempts += 1
+            if self._attempt(pipeline_factory):
+                self.error = None
+                print('Warm-up completed')
+                break
+            if time.time() + delay > deadline:
+                print(f'Warm-up giving up after {self.attempts} attempts')
+                break
+            print(f'Retrying warm-up in {delay:.0f}s')
+            time.sleep(delay)
+            delay = min(delay * 2, Config.WARMUP_MAX_RETRY_SECONDS)
+
+        self.finished_at = time.time()
+        return self.report()
+
+    def start(self, pipeline_factory) -> threading.Thread:
+        """Run warm-up in a background thread."""
+        thread = threading.Thread(
+            target=self.run,
+            args=(pipeline_factory,),
+            name='rag-warmup',
+            daemon=True
+        )
+        thread.start()
+        return thread
+
+    @property
+    def is_ready(self) -> bool:
+        with self._lock:
+            return all(self.stages[stage] == 'ready' for stage in self.REQUIRED_STAGES)
+
+    def report(self) -> Dict:
+        """Current warm-up status."""
+        duration: Optional[float] = None
+        if self.started_at and self.finished_at:
+            duration = round(self.finished_at - self.started_at, 3)
+
+        with self._lock:
+            stages = dict(self.stages)
+
+        return {
+            'ready': all(stages[stage] == 'ready' for stage in self.REQUIRED_STAGES),
+            'stages': stages,
+            'error': self.error,
+            'attempts': self.attempts,
+            'duration_seconds': duration
+        }
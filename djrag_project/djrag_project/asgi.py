@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'djrag_project.settings')
 
 application = get_asgi_application()
+
+# Load models, index and LLM connection before traffic arrives
+from web_app.utils import start_warmup
+
+start_warmup()
@@ -16,8 +16,11 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
+from web_app import views as web_views
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('healthz', web_views.healthz, name='healthz'),
+    path('readyz', web_views.readyz, name='readyz'),
     path('', include('web_app.urls'))
 ]
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'djrag_project.settings')
 
 application = get_wsgi_application()
+
+# Load models, index and LLM connection before traffic arrives
+from web_app.utils import start_warmup
+
+start_warmup()
@@ -0,0 +1,199 @@
+import hashlib
+import json
+import time
+
+from django.core.cache import cache
+from django.http import HttpResponseNotModified, JsonResponse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
+from langchain_core.messages import AIMessage, HumanMessage
+
+from .models import QueryHistory
+from .utils import get_pipeline_snapshot
+
+# web_app.utils puts the project root on sys.path for customer_support
+from customer_support.modules.config import Config
+from customer_support.modules.metadata_index import RANGE_OPERATORS, FilterError
+
+
+class RequestValidationError(ValueError):
+    """Raised when an API request body or query string is invalid."""
+
+
+def validate_filters(filters):
+    """
+    Check metadata filters: known fields mapped to a string or list of strings,
+    or for effective_date a range such as {"as_of": "2024-06-01"}.
+    """
+    if filters is None:
+        return {}
+    if not isinstance(filters, dict):
+        raise RequestValidationError('"filters" must be an object')
+
+    for field, value in filters.items():
+        if field not in Config.FILTER_FIELDS:
+            raise RequestValidationError(f'Unknown filter field: {field}')
+        if field == 'effective_date' and isinstance(value, dict):
+            if not value or set(value) - set(RANGE_OPERATORS) or not all(
+                    isinstance(item, str) for item in value.values()):
+                raise RequestValidationError(
+                    f'"effective_date" range takes ISO date strings for {", ".join(RANGE_OPERATORS)}'
+                )
+            continue
+        values = value if isinstance(value, list) else [value]
+        if not values or not all(isinstance(item, str) for item in values):
+            raise RequestValidationError(f'Filter "{field}" must be a string or list of strings')
+    return filters
+
+
+def validate_chat_history(chat_history):
+    """Convert [{"role": "user"|"assistant", "content": "..."}] into messages."""
+    if chat_history is None:
+        return []
+    if not isinstance(chat_history, list):
+        raise RequestValidationError('"chat_history" must be a list')
+
+    messages = []
+    for turn in chat_history:
+        if not isinstance(turn, dict) or not isinstance(turn.get('content'), str):
+            raise RequestValidationError('Each chat_history item needs a "content" string')
+        if turn.get('role') == 'user':
+            messages.append(HumanMessage(content=turn['content']))
+        elif turn.get('role') == 'assistant':
+            messages.append(AIMessage(content=turn['content']))
+        else:
+            raise RequestValidationError('chat_history "role" must be "user" or "assistant"')
+    return messages
+
+
+def parse_query_request(request):
+    """
+    Read and validate a query from a JSON body (POST) or query string (GET).
+
+    Returns:
+        Tuple of (question, filters, chat_history)
+    """
+    if request.method == 'GET':
+        data = {
+            'question': request.GET.get('question', ''),
+            'filters': {
+                field: request.GET.getlist(field)
+                for field in Config.FILTER_FIELDS if field in request.GET
+            }
+        }
+    else:
+        try:
+            data = json.loads(request.body or b'{}')
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            raise RequestValidationError('Request body must be valid JSON')
+        if not isinstance(data, dict):
+            raise RequestValidationError('Request body must be a JSON object')
+
+    question = data.get('question')
+    if not isinstance(question, str) or not question.strip():
+        raise RequestValidationError('"question" is required')
+    question = question.strip()
+    if len(question) > Config.API_MAX_QUESTION_LENGTH:
+        raise RequestValidationError(
+            f'"question" must be at most {Config.API_MAX_QUESTION_LENGTH} characters'
+        )
+
+    return question, validate_filters(data.get('filters')), validate_chat_history(data.get('chat_history'))
+
+
+def cache_key(question, filters, index_version):
+    """Identical questions against the same index version share a cache entry."""
+    payload = json.dumps({
+        'question': ' '.join(question.split()).casefold(),
+        'filters': filters,
+        'index_version': index_version
+    }, sort_keys=True)
+    # Entries hold {'payload', 'etag'}; the prefix changed with that format
+    return 'api-answer:' + hashlib.sha256(payload.encode()).hexdigest()
+
+
+def payload_etag(payload):
+    """Strong ETag over the response body, so a changed answer gets a new tag."""
+    body = json.dumps(payload, sort_keys=True)
+    return f'"{hashlib.sha256(body.encode()).hexdigest()[:32]}"'
+
+
+def etag_matches(request, etag):
+    """
+    Weak comparison against If-None-Match (GZipMiddleware weakens our ETag).
+
+    Only call this with the ETag of an answer that exists: '*' matches any.
+    """
+    header = request.headers.get('If-None-Match', '')
+    candidates = [tag.strip().removeprefix('W/') for tag in header.split(',')]
+    return '*' in candidates or etag in candidates
+
+
+@csrf_exempt
+@require_http_methods(['GET', 'POST'])
+def query_api(request):
+    """JSON query endpoint for the chat widget and mobile app."""
+    started = time.perf_counter()
+
+    try:
+        question, filters, chat_history = parse_query_request(request)
+    except RequestValidationError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    rag, index_version = get_pipeline_snapshot()
+
+    # Answers that depend on chat history are never cached or revalidated
+    cacheable = not chat_history
+    key = cache_key(question, filters, index_version)
+    entry = cache.get(key) if cacheable else None
+    cached = entry is not None
+
+    # Revalidate only against an answer we actually hold
+    if cached and request.method == 'GET' and etag_matches(request, entry['etag']):
+        response = HttpResponseNotModified()
+        response['ETag'] = entry['etag']
+        patch_cache_control(response, private=True, max_age=Config.API_CACHE_SECONDS)
+        return response
+
+    if cached:
+        payload, etag = entry['payload'], entry['etag']
+    else:
+        try:
+            result = rag.query(question, chat_history, filters=filters or None)
+        except FilterError as e:
+            # Never answer (or cache) a filtered question without its filters
+            return JsonResponse({'error': str(e)}, status=400)
+        if 'error' in result:
+            # The LLM call failed; its message is logged, not sent to clients
+            response = JsonResponse({'error': 'The assistant is temporarily unavailable'}, status=503)
+            patch_cache_control(response, no_store=True)
+            return response
+        payload = {
+            'question': question,
+            'answer': result['answer'],
+            'sources': result['sources'],
+            'source_count': result['source_count']
+        }
+        etag = payload_etag(payload)
+
+        QueryHistory.objects.create(
+            question=question,
+            answer=result['answer'][:1000]
+        )
+        # Fallback answers (no sources retrieved) are not worth caching
+        cacheable = cacheable and result['source_count'] > 0
+        if cacheable:
+            cache.set(key, {'payload': payload, 'etag': etag}, Config.API_CACHE_SECONDS)
+
+    response = JsonResponse(dict(payload, timing={
+        'total_ms': round((time.perf_counter() - started) * 1000, 2),
+        'cached': cached
+    }))
+
+    if cacheable:
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, max_age=Config.API_CACHE_SECONDS)
+    else:
+        patch_cache_control(response, no_store=True)
+    return response
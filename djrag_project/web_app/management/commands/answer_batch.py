@@ -0,0 +1,176 @@
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+# web_app.utils puts the project root on sys.path for customer_support
+from web_app.api import RequestValidationError, validate_filters
+from web_app.utils import get_rag_pipeline
+from customer_support.modules.config import Config
+from customer_support.modules.rag_pipeline import RAGPipeline
+
+
+class Command(BaseCommand):
+    help = 'Answer questions from a JSONL file and write the results as JSONL (resumable).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', help='JSONL with {"id", "question", "filters"} per line')
+        parser.add_argument('output', help='JSONL results; existing ids are skipped on resume')
+        parser.add_argument('--chunk-size', type=int, default=Config.BATCH_CHUNK_SIZE,
+                            help='Questions per batch; results are checkpointed after each')
+        parser.add_argument('--concurrency', type=int, default=Config.BATCH_MAX_CONCURRENCY,
+                            help='Concurrent LLM calls')
+
+    def read_items(self, path):
+        """Read input questions, defaulting ids to line numbers."""
+        if not os.path.exists(path):
+            raise CommandError(f'Input file not found: {path}')
+
+        items = []
+        with open(path) as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    item = json.loads(line)
+                except json.JSONDecodeError:
+                    raise CommandError(f'Line {line_number}: invalid JSON')
+                if not isinstance(item, dict):
+                    raise CommandError(f'Line {line_number}: expected a JSON object')
+                if not item.get('question'):
+                    raise CommandError(f'Line {line_number}: missing "question"')
+                item.setdefault('id', line_number)
+                items.append(item)
+        return items
+
+    @staticmethod
+    def error_record(item, error, error_type='failed'):
+        """
+        Result line for a question that could not be answered.
+
+        'validation' errors (bad input) are final; other errors are retried
+        on the next run.
+        """
+        return {
+            'id': item['id'],
+            'question': item['question'],
+            'answer': '',
+            'sources': [],
+            'source_count': 0,
+            'error': error,
+            'error_type': error_type
+        }
+
+    @staticmethod
+    def is_done(record):
+        """Answered, or failed in a way a retry cannot fix."""
+        return 'error' not in record or record.get('error_type') == 'validation'
+
+    def read_done(self, path):
+        """
+        Ids already answered.
+
+        Drops a partially written last line and records of failures that
+        should be retried, so their new results replace them.
+        """
+        if not os.path.exists(path):
+            return set()
+
+        valid = []
+        with open(path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if self.is_done(record):
+                    valid.append(record)
+
+        # Rewrite so new results are not appended after a torn line
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
+            for record in valid:
+                f.write(json.dumps(record) + '\n')
+        os.replace(tmp_path, path)
+
+        return {record['id'] for record in valid}
+
+    def handle(self, *args, **options):
+        items = self.read_items(options['input'])
+        done = self.read_done(options['output'])
+        pending = [item for item in items if item['id'] not in done]
+        self.stdout.write(f'{len(items)} questions, {len(done)} already done, {len(pending)} to go')
+
+        if not pending:
+            return
+
+        # batch_query applies one filter set per call, so group by filters.
+        # Within a group, repeats of a question (across the whole input, not
+        # just one chunk) are answered once. Items with invalid filters get
+        # an error record instead of a group.
+        groups = {}
+        invalid = []
+        for item in pending:
+            try:
+                filters = validate_filters(item.get('filters'))
+            except RequestValidationError as e:
+                invalid.append(self.error_record(item, str(e), 'validation'))
+                continue
+            key = json.dumps(filters, sort_keys=True)
+            question_key = RAGPipeline._normalize_question(item['question'])
+            groups.setdefault(key, {}).setdefault(question_key, []).append(item)
+
+        unique = sum(len(group) for group in groups.values())
+        if unique < len(pending) - len(invalid):
+            self.stdout.write(f'{unique} unique questions')
+
+        chunk_size = options['chunk_size']
+        answered = 0
+        started = time.perf_counter()
+
+        with open(options['output'], 'a') as output:
+            def checkpoint(records):
+                for record in records:
+                    output.write(json.dumps(record) + '\n')
+                # A crash loses at most the current chunk
+                output.flush()
+                os.fsync(output.fileno())
+
+            if invalid:
+                checkpoint(invalid)
+                answered += len(invalid)
+                self.stderr.write(f'{len(invalid)} questions have invalid filters')
+
+            rag = get_rag_pipeline() if groups else None
+            for key, group in groups.items():
+                filters = json.loads(key) or None
+                # Each entry is every item asking the same question
+                askers = list(group.values())
+                for offset in range(0, len(askers), chunk_size):
+                    chunk = askers[offset:offset + chunk_size]
+                    chunk_items = [item for same in chunk for item in same]
+                    try:
+                        results = rag.batch_query(
+                            [same[0]['question'] for same in chunk],
+                            filters=filters,
+                            max_concurrency=options['concurrency']
+                        )
+                        records = [
+                            dict(result, id=item['id'], question=item['question'])
+                            for same, result in zip(chunk, results) for item in same
+                        ]
+                    except Exception as e:
+                        # e.g. a filter the index cannot apply; later chunks still run
+                        self.stderr.write(f'Chunk failed ({len(chunk_items)} questions): {e}')
+                        records = [self.error_record(item, str(e)) for item in chunk_items]
+                    checkpoint(records)
+
+                    answered += len(chunk_items)
+                    elapsed = time.perf_counter() - started
+                    self.stdout.write(
+                        f'{answered}/{len(pending)} answered '
+                        f'({answered / elapsed:.1f} questions/s)'
+                    )
+
+        self.stdout.write(self.style.SUCCESS(f'Wrote results to {options["output"]}'))
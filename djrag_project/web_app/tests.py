@@ -1,3 +1,582 @@
-from django.test import TestCase
+import asyncio
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import LiveServerTestCase, RequestFactory, SimpleTestCase
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+# web_app.utils puts the project root on sys.path for customer_support
+from . import api, utils
+from .management.commands.answer_batch import Command as AnswerBatchCommand
+from customer_support.modules.document_processor import DocumentProcessor
+from customer_support.modules.faq_index import FAQIndex
+from customer_support.modules.index_versions import IndexVersionStore
+from customer_support.modules.llm_client import (
+    LLMClient, RequestLimiter, TokenBucket, llm_priority, parse_reset_duration
+)
+from customer_support.modules.metadata_index import FilterError, MetadataFilterIndex
+from customer_support.modules.load_test import VirtualUser
+from customer_support.modules.rag_pipeline import UNAVAILABLE_ANSWER, RAGPipeline
+from customer_support.modules.mock_llm_server import MockLLMSettings, start_mock_server
+
+MANUAL_PATH = os.path.join(utils.smart_customer_support_dir, 'data', 'safebank-manual.pdf')
+
+
+def wait_for(condition, timeout=5):
+    """Poll until `condition()` is true (threads need a moment to queue up)."""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError('Timed out waiting for condition')
+        time.sleep(0.01)
+
+
+class TokenBucketTests(SimpleTestCase):
+
+    def test_full_bucket_admits_immediately(self):
+        bucket = TokenBucket(tokens_per_minute=600)
+        self.assertEqual(bucket.wait_time(100), 0)
+
+    def test_wait_time_after_draining(self):
+        bucket = TokenBucket(tokens_per_minute=600)  # 10 tokens/s
+        bucket.consume(600)
+        self.assertAlmostEqual(bucket.wait_time(50), 5.0, delta=0.1)
+
+    def test_oversized_request_waits_for_full_bucket_only(self):
+        bucket = TokenBucket(tokens_per_minute=600)
+        self.assertEqual(bucket.wait_time(10_000), 0)
+
+    def test_sync_lowers_tokens_and_pauses_when_exhausted(self):
+        bucket = TokenBucket(tokens_per_minute=6000)
+        bucket.sync(remaining=100, reset_seconds=0)
+        self.assertLessEqual(bucket.tokens, 101)
+
+        bucket.sync(remaining=0, reset_seconds=2)
+        self.assertGreater(bucket.wait_time(1), 1.5)
+
+    def test_parse_reset_duration(self):
+        self.assertEqual(parse_reset_duration('2'), 2.0)
+        self.assertAlmostEqual(parse_reset_duration('7.66s'), 7.66)
+        self.assertAlmostEqual(parse_reset_duration('2m59.56s'), 179.56)
+        self.assertAlmostEqual(parse_reset_duration('120ms'), 0.12)
+        self.assertEqual(parse_reset_duration(None), 0.0)
+
+
+class RequestLimiterTests(SimpleTestCase):
+
+    def test_interactive_is_admitted_before_earlier_batch(self):
+        limiter = RequestLimiter(max_concurrency=1, tokens_per_minute=60_000)
+        limiter.acquire(1)
+        admitted = []
+
+        def worker(priority):
+            with llm_priority(priority), limiter.slot(1):
+                admitted.append(priority)
+
+        batch = threading.Thread(target=worker, args=('batch',))
+        batch.start()
+        wait_for(lambda: len(limiter._waiting) == 1)
+        interactive = threading.Thread(target=worker, args=('interactive',))
+        interactive.start()
+        wait_for(lambda: len(limiter._waiting) == 2)
+
+        limiter.release()
+        batch.join(5)
+        interactive.join(5)
+        self.assertEqual(admitted, ['interactive', 'batch'])
+        self.assertEqual(limiter.active, 0)
+
+    def test_waits_for_tokens(self):
+        limiter = RequestLimiter(max_concurrency=4, tokens_per_minute=600)  # 10 tokens/s
+        limiter.acquire(600)
+        limiter.release()
+
+        started = time.monotonic()
+        limiter.acquire(5)
+        self.assertGreaterEqual(time.monotonic() - started, 0.4)
+        limiter.release()
+
+    def test_retry_after_pauses_admission(self):
+        limiter = RequestLimiter(max_concurrency=4, tokens_per_minute=60_000)
+        limiter.on_rate_limit(remaining=None, reset=None, retry_after='1')
+
+        started = time.monotonic()
+        limiter.acquire(1)
+        self.assertGreaterEqual(time.monotonic() - started, 0.9)
+        limiter.release()
+
+    def test_interrupted_acquire_leaves_queue(self):
+        limiter = RequestLimiter(max_concurrency=1, tokens_per_minute=60_000)
+        limiter.acquire(1)
+
+        with mock.patch.object(limiter._condition, 'wait', side_effect=KeyboardInterrupt):
+            with self.assertRaises(KeyboardInterrupt):
+                limiter.acquire(1)
+        self.assertEqual(limiter._waiting, [])
+
+        limiter.release()
+        limiter.acquire(1)
+        self.assertEqual(limiter.active, 1)
+
+    def test_cancelled_async_waiter_does_not_leak_slot(self):
+        limiter = RequestLimiter(max_concurrency=1, tokens_per_minute=60_000)
+
+        async def scenario():
+            limiter.acquire(1)
+
+            async def waiter():
+                async with limiter.aslot(1):
+                    pass
+
+            task = asyncio.create_task(waiter())
+            await asyncio.sleep(0.1)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            limiter.release()
+
+            # The slot is free again and the queue is empty
+            await asyncio.wait_for(limiter.aacquire(1), timeout=1)
+            limiter.release()
+
+        asyncio.run(scenario())
+        self.assertEqual(limiter.active, 0)
+        self.assertEqual(limiter._waiting, [])
+
+
+class LLMClientMockServerTests(SimpleTestCase):
+    """LLMClient against the local OpenAI/Groq-compatible mock server."""
+
+    def start_server(self, **settings):
+        server = start_mock_server(settings=MockLLMSettings(
+            latency_ms=0, jitter_ms=0, token_delay_ms=0, **settings
+        ))
+        self.addCleanup(server.shutdown)
+        client = LLMClient(base_url=f'http://127.0.0.1:{server.server_port}')
+        self.addCleanup(client.http_client.close)
+        return client
+
+    def test_chat_model_round_trip(self):
+        client = self.start_server()
+        llm = client.chat_model(api_key='mock-key', max_retries=0)
+
+        response = llm.invoke('How do I reset my PIN?')
+        self.assertIn('SafeBank', response.content)
+        self.assertEqual(client.limiter.active, 0)
+
+    def test_streaming_takes_one_slot(self):
+        client = self.start_server()
+        llm = client.chat_model(api_key='mock-key', max_retries=0, streaming=True)
+
+        with mock.patch.object(client.limiter, 'acquire', wraps=client.limiter.acquire) as acquire:
+            response = llm.invoke('How do I reset my PIN?')
+
+        self.assertIn('SafeBank', response.content)
+        self.assertEqual(acquire.call_count, 1)
+        self.assertEqual(client.limiter.active, 0)
+
+    def test_rate_limit_headers_update_bucket(self):
+        client = self.start_server(tokens_per_minute=100)
+        llm = client.chat_model(api_key='mock-key', max_retries=0)
+
+        llm.invoke('How do I reset my PIN?')
+        # x-ratelimit-remaining-tokens (100) is below our 6000/min bucket
+        self.assertLessEqual(client.limiter.bucket.tokens, 101)
+
+    def test_429_retry_after_pauses_limiter(self):
+        client = self.start_server(error_rate=1.0)
+        llm = client.chat_model(api_key='mock-key', max_retries=0)
+
+        with self.assertRaises(Exception):
+            llm.invoke('How do I reset my PIN?')
+        self.assertGreater(client.limiter.bucket.blocked_until, time.monotonic())
+        self.assertEqual(client.limiter.active, 0)
+
+
+class FAQExtractionTests(SimpleTestCase):
+
+    def test_manual_yields_faq_entries(self):
+        processor = DocumentProcessor()
+        entries = processor.extract_layout_faq_entries(processor.load_pdf_elements(MANUAL_PATH))
+
+        self.assertTrue(entries)
+        self.assertTrue(all(entry['question'] and entry['answer'] for entry in entries))
+
+    def test_headings_become_keys_without_section_numbers(self):
+        element = lambda text, size=10, bold=False: {
+            'type': 'text', 'text': text, 'page': 0, 'y': 0, 'size': size, 'bold': bold
+        }
+        elements = [
+            element('13. Customer Support', size=14),
+            element('Phone: 1-800-123-4567 (Weekdays, 8 AM - 8 PM local time). ' * 3),
+            element('do not share your PIN with anyone'),
+        ]
+        entries = DocumentProcessor().extract_layout_faq_entries(elements)
+
+        self.assertEqual([entry['question'] for entry in entries], ['Customer Support'])
+        self.assertIn('do not share your PIN', entries[0]['answer'])
+
+
+class FAQCalibrationTests(SimpleTestCase):
+
+    def make_index(self):
+        entries = [
+            {'question': 'Customer Support', 'answer': 'Phone: 1-800-123-4567', 'metadata': {}},
+            {'question': 'Password Recovery', 'answer': 'Go to My Account', 'metadata': {}},
+        ]
+        return FAQIndex(None, entries, np.eye(2, dtype='float32'))
+
+    def test_threshold_is_lowest_precise_score(self):
+        index = self.make_index()
+        # Scores against entry 0: 1.0 and 0.9 answer correctly, 0.8 does not
+        vectors = [[1.0, 0.0], [0.9, 0.436], [0.8, 0.6]]
+        correct = {0: True, 1: True, 2: False}
+
+        threshold = index.calibrate(vectors, lambda number, entry: correct[number], target_precision=1.0)
+
+        self.assertAlmostEqual(threshold, 0.9, places=2)
+        self.assertIsNone(index.match_vectors(['wrong'], [[0.8, 0.6]])[0])
+        self.assertIsNotNone(index.match_vectors(['right'], [[0.9, 0.436]])[0])
+
+    def test_no_precise_threshold_keeps_default(self):
+        index = self.make_index()
+        default = index.min_score
+
+        self.assertIsNone(index.calibrate([[1.0, 0.0]], lambda number, entry: False))
+        self.assertEqual(index.min_score, default)
+
+    def test_threshold_never_below_floor(self):
+        index = self.make_index()
+        threshold = index.calibrate([[0.5, 0.866]], lambda number, entry: True)
+        self.assertGreaterEqual(threshold, 0.75)
+
+
+class MetadataFilterIndexTests(SimpleTestCase):
+    CHUNKS = [
+        {'document': 'manual', 'product': 'cards', 'locale': 'en', 'effective_date': '2023-01-01'},
+        {'document': 'manual', 'product': 'loans', 'locale': 'en', 'effective_date': '2023-01-01'},
+        {'document': 'manual', 'product': 'cards', 'locale': 'en', 'effective_date': '2024-01-01'},
+        {'document': 'fees', 'product': 'cards', 'locale': 'fr', 'effective_date': '2022-06-01'},
+        {'document': 'fees', 'product': 'loans', 'locale': 'en'},
+    ]
+
+    def setUp(self):
+        docs = {str(i): SimpleNamespace(metadata=metadata) for i, metadata in enumerate(self.CHUNKS)}
+        vector_store = SimpleNamespace(
+            index=SimpleNamespace(ntotal=len(docs)),
+            index_to_docstore_id={i: str(i) for i in range(len(docs))},
+            docstore=SimpleNamespace(search=docs.get),
+        )
+        self.index = MetadataFilterIndex(vector_store)
+
+    def selected(self, filters):
+        return [int(i) for i in self.index.select(filters).nonzero()[0]]
+
+    def test_values_within_a_field_are_or_ed(self):
+        self.assertEqual(self.selected({'locale': ['fr', 'de']}), [3])
+        self.assertEqual(self.selected({'product': ['cards', 'loans']}), [0, 1, 2, 3, 4])
+
+    def test_fields_are_and_ed(self):
+        self.assertEqual(self.selected({'product': 'cards', 'locale': 'en'}), [0, 2])
+        self.assertEqual(self.selected({'document': 'fees', 'product': ['loans']}), [4])
+
+    def test_as_of_keeps_newest_version_per_document(self):
+        self.assertEqual(self.selected({'effective_date': {'as_of': '2024-06-01'}}), [2, 3])
+        self.assertEqual(self.selected({'effective_date': {'as_of': '2023-06-01'}}), [0, 1, 3])
+        self.assertEqual(self.selected({'effective_date': {'gte': '2023-01-01'}}), [0, 1, 2])
+
+    def test_empty_subset_returns_no_documents(self):
+        self.assertEqual(self.selected({'locale': 'de'}), [])
+        self.assertEqual(self.index.search_by_vectors([[0.0], [1.0]], 4, {'locale': 'de'}), [[], []])
+
+    def test_unusable_filters_raise(self):
+        with self.assertRaises(FilterError):
+            self.index.select({'section': 'Fees'})
+        with self.assertRaises(FilterError):
+            self.index.select({'effective_date': {'before': '2024-01-01'}})
+
+
+class FakeVectorStore:
+    """Stands in for a FAISS store: writes the two index files save_local does."""
+
+    def __init__(self, content=b'index'):
+        self.content = content
+        self.index = SimpleNamespace(ntotal=1)
+
+    def save_local(self, path):
+        os.makedirs(path)
+        for name in ('index.faiss', 'index.pkl'):
+            with open(os.path.join(path, name), 'wb') as f:
+                f.write(self.content)
+
+
+class IndexVersionStoreTests(SimpleTestCase):
+
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        self.store = IndexVersionStore(root)
+
+    def write(self, content=b'index'):
+        return self.store.write(FakeVectorStore(content))
+
+    def test_promote_moves_current_to_previous(self):
+        first, second = self.write(b'first'), self.write(b'second')
+        self.store.promote(first)
+        self.store.promote(second)
+
+        self.assertEqual(self.store.current_version(), second)
+        self.assertEqual(self.store.previous_version(), first)
+
+    def test_rollback_swaps_back(self):
+        first, second = self.write(b'first'), self.write(b'second')
+        self.store.promote(first)
+        self.store.promote(second)
+
+        self.assertEqual(self.store.rollback(), first)
+        self.assertEqual(self.store.current_version(), first)
+        self.assertEqual(self.store.previous_version(), second)
+
+    def test_rollback_without_previous_raises(self):
+        self.store.promote(self.write())
+        with self.assertRaises(ValueError):
+            self.store.rollback()
+
+    def test_prune_keeps_current_and_previous(self):
+        versions = [self.write(b'0'), self.write(b'1')]
+        self.store.promote(versions[0])
+        self.store.promote(versions[1])
+        versions += [self.write(str(i).encode()) for i in range(2, 5)]
+
+        self.store.prune(keep=2)
+
+        remaining = [m['version'] for m in self.store.list_versions()]
+        self.assertEqual(remaining, [versions[0], versions[1], versions[3], versions[4]])
+
+    def test_checksum_mismatch_blocks_promotion(self):
+        version = self.write()
+        with open(os.path.join(self.store.version_path(version), 'index.faiss'), 'ab') as f:
+            f.write(b'corrupt')
+
+        with self.assertRaises(ValueError):
+            self.store.promote(version)
+        self.assertIsNone(self.store.current_version())
+
+    def test_failed_write_leaves_no_tmp_dir(self):
+        faq_index = mock.Mock(entries=[], min_score=0.9)
+        faq_index.save.side_effect = OSError('disk full')
+
+        with self.assertRaises(OSError):
+            self.store.write(FakeVectorStore(), faq_index)
+        self.assertEqual(os.listdir(self.store.versions_dir), [])
+
+
+class IndexReloadTests(SimpleTestCase):
+
+    def parts(self, version):
+        return (mock.Mock(name=f'rag-{version}'), SimpleNamespace(loaded_version=version, embeddings=None), None)
+
+    def test_rollback_swaps_in_standby_without_loading(self):
+        serving, standby = self.parts('v2'), self.parts('v1')
+
+        with mock.patch.object(utils, '_pipeline_parts', serving), \
+                mock.patch.object(utils, '_standby_parts', standby), \
+                mock.patch('customer_support.modules.vector_store.VectorStoreManager') as manager:
+            utils._reload_index('v1')
+
+            self.assertIs(utils._pipeline_parts, standby)
+            self.assertIs(utils._standby_parts, serving)
+            manager.assert_not_called()
+
+    def test_failed_reload_keeps_serving_and_backs_off(self):
+        serving = self.parts('v1')
+
+        with mock.patch.object(utils, '_pipeline_parts', serving), \
+                mock.patch.object(utils, '_standby_parts', None), \
+                mock.patch.dict(utils._failed_versions, clear=True), \
+                mock.patch('customer_support.modules.vector_store.VectorStoreManager') as manager:
+            manager.return_value.load_vector_store.side_effect = ValueError('Checksum mismatch')
+            utils._reload_index('v2')
+
+            self.assertIs(utils._pipeline_parts, serving)
+            self.assertEqual(utils._failed_versions['v2'][0], 1)
+
+
+class AnswerBatchTests(SimpleTestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir, ignore_errors=True)
+        self.command = AnswerBatchCommand()
+
+    def write_lines(self, name, lines):
+        path = os.path.join(self.dir, name)
+        with open(path, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+        return path
+
+    def test_invalid_json_names_the_line(self):
+        path = self.write_lines('input.jsonl', ['{"question": "PIN?"}', '{"question": '])
+        with self.assertRaisesMessage(CommandError, 'Line 2: invalid JSON'):
+            self.command.read_items(path)
+
+    def test_non_object_line_is_rejected(self):
+        path = self.write_lines('input.jsonl', ['["How do I reset my PIN?"]'])
+        with self.assertRaisesMessage(CommandError, 'Line 1'):
+            self.command.read_items(path)
+
+    def test_only_validation_errors_count_as_done(self):
+        path = self.write_lines('output.jsonl', [
+            json.dumps({'id': 1, 'answer': 'Call 1-800-123-4567'}),
+            json.dumps(AnswerBatchCommand.error_record({'id': 2, 'question': 'q'}, 'bad filter', 'validation')),
+            json.dumps(AnswerBatchCommand.error_record({'id': 3, 'question': 'q'}, 'rate limited')),
+            json.dumps({'id': 4, 'answer': '', 'error': 'timeout'}),
+            '{"id": 5, "answ',
+        ])
+
+        self.assertEqual(self.command.read_done(path), {1, 2})
+        # Retried and torn records are dropped so new results replace them
+        with open(path) as f:
+            self.assertEqual([json.loads(line)['id'] for line in f], [1, 2])
+
+    def test_repeated_questions_are_answered_once_across_chunks(self):
+        lines = [
+            json.dumps({'id': 1, 'question': 'How do I reset my PIN?'}),
+            json.dumps({'id': 2, 'question': 'What are the ATM fees?'}),
+            json.dumps({'id': 3, 'question': '  how do I reset my  PIN?'}),
+            json.dumps({'id': 4, 'question': 'How do I reset my PIN?', 'filters': {'locale': 'fr'}}),
+        ]
+        input_path = self.write_lines('input.jsonl', lines)
+        output_path = os.path.join(self.dir, 'output.jsonl')
+        rag = mock.Mock()
+        rag.batch_query.side_effect = lambda questions, **kwargs: [
+            {'question': q, 'answer': f'answer to {q}'} for q in questions
+        ]
+
+        with mock.patch(f'{AnswerBatchCommand.__module__}.get_rag_pipeline', return_value=rag):
+            call_command(AnswerBatchCommand(), input_path, output_path, chunk_size=1,
+                         stdout=io.StringIO(), stderr=io.StringIO())
+
+        asked = [q for call in rag.batch_query.call_args_list for q in call.args[0]]
+        self.assertEqual(asked, ['How do I reset my PIN?', 'What are the ATM fees?', 'How do I reset my PIN?'])
+        with open(output_path) as f:
+            records = {record['id']: record for record in map(json.loads, f)}
+        self.assertEqual(set(records), {1, 2, 3, 4})
+        self.assertEqual(records[3]['answer'], 'answer to How do I reset my PIN?')
+        self.assertEqual(records[3]['question'], '  how do I reset my  PIN?')
+
+
+class QueryAPITests(SimpleTestCase):
+
+    def setUp(self):
+        self.rag = mock.Mock()
+        patcher = mock.patch.object(api, 'get_pipeline_snapshot', return_value=(self.rag, 'v1'))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        history = mock.patch.object(api, 'QueryHistory')
+        history.start()
+        self.addCleanup(history.stop)
+        api.cache.clear()
+
+    def answer(self, text='Call 1-800-123-4567'):
+        self.rag.query.return_value = {
+            'question': 'q', 'answer': text, 'sources': [{'content': 'Support'}], 'source_count': 1
+        }
+
+    def get(self, question, **headers):
+        request = RequestFactory().get('/api/query', {'question': question}, **headers)
+        return api.query_api(request)
+
+    def test_llm_failure_returns_503_without_upstream_message(self):
+        self.rag.query.return_value = {
+            'question': 'PIN?', 'answer': UNAVAILABLE_ANSWER, 'sources': [], 'source_count': 0,
+            'error': 'Error code: 429 - org_01abc rate limit reached'
+        }
+
+        response = self.get('How do I reset my PIN?')
+
+        self.assertEqual(response.status_code, 503)
+        self.assertNotIn(b'org_01abc', response.content)
+        self.assertIn('no-store', response['Cache-Control'])
+
+    def test_if_none_match_star_needs_a_cached_answer(self):
+        self.answer()
+
+        response = self.get('Who do I call?', HTTP_IF_NONE_MATCH='*')
+
+        self.assertEqual(response.status_code, 200)
+        self.rag.query.assert_called_once()
+
+    def test_etag_revalidates_cached_answer(self):
+        self.answer()
+        etag = self.get('Who do I call?')['ETag']
+
+        self.assertEqual(self.get('Who do I call?', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.get('who do i call?', HTTP_IF_NONE_MATCH=f'W/{etag}').status_code, 304)
+        self.assertEqual(self.get('Who do I call?', HTTP_IF_NONE_MATCH='"stale"').status_code, 200)
+        self.rag.query.assert_called_once()
+
+    def test_etag_follows_the_answer(self):
+        self.answer('Call 1-800-123-4567')
+        first = self.get('Who do I call?')['ETag']
+        api.cache.clear()
+        self.answer('Call 1-800-765-4321')
+
+        response = self.get('Who do I call?', HTTP_IF_NONE_MATCH=first)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], first)
+
+
+class StaticRetriever(BaseRetriever):
+    """Returns the same passage for every question."""
+
+    def _get_relevant_documents(self, query, *, run_manager):
+        return [Document(page_content='Phone: 1-800-123-4567', metadata={'page': 12})]
+
+
+class LoadTestFailureTests(LiveServerTestCase):
+    """LLM failures behind the app must count as failed load-test requests."""
+
+    def setUp(self):
+        server = start_mock_server(settings=MockLLMSettings(
+            latency_ms=0, jitter_ms=0, token_delay_ms=0, error_rate=1.0
+        ))
+        self.addCleanup(server.shutdown)
+        client = LLMClient(base_url=f'http://127.0.0.1:{server.server_port}')
+        self.addCleanup(client.http_client.close)
+
+        rag = RAGPipeline(StaticRetriever(), llm=client.chat_model(api_key='mock-key', max_retries=0))
+        parts = (rag, SimpleNamespace(loaded_version=None), None)
+        for patcher in (mock.patch.object(utils, '_pipeline_parts', parts),
+                        mock.patch.object(utils, 'maybe_reload_index')):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        api.cache.clear()
+
+    def run_user(self, endpoint):
+        user = VirtualUser(self.live_server_url, endpoint, ['Who do I call?'])
+        self.addCleanup(user.close)
+        user.setup()
+        return user.request()
+
+    def test_form_request_fails(self):
+        result = self.run_user('/query/')
+        self.assertFalse(result['ok'])
+        self.assertEqual(result['error'], 'HTTP 503')
+
+    def test_api_request_fails(self):
+        result = self.run_user('/api/query')
+        self.assertFalse(result['ok'])
+        self.assertEqual(result['error'], 'HTTP 503')
@@ -1,7 +1,8 @@
 from django.urls import path
-from . import views
+from . import api, views
 
 urlpatterns = [
     path('', views.index, name='index'),
     path('query/', views.query_view, name='query'),
+    path('api/query', api.query_api, name='api_query'),
 ]
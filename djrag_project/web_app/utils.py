@@ -0,0 +1,169 @@
+import os
+import sys
+import threading
+import time
+
+# Add the project root to Python path
+current_file = os.path.abspath(__file__)  # web_app/utils.py
+djrag_project_dir = os.path.dirname(os.path.dirname(current_file))  # djrag_project/
+smart_customer_support_dir = os.path.dirname(djrag_project_dir)  # smart_customer_support/
+
+sys.path.insert(0, smart_customer_support_dir)  # For customer_support module
+
+from customer_support.modules.config import Config
+from customer_support.modules.index_versions import IndexVersionStore
+from customer_support.modules.warmup import WarmupManager
+
+_pipeline_lock = threading.Lock()
+_pipeline_parts = None
+
+# Index hot-reload state; the previously served pipeline is kept as a
+# standby so a rollback swaps back without reloading
+_reload_lock = threading.Lock()
+_last_reload_check = 0.0
+_standby_parts = None
+# Versions that failed to load: version -> (failures, monotonic time of next retry)
+_failed_versions = {}
+
+warmup = WarmupManager()
+
+
+def build_pipeline():
+    """Build the RAG pipeline once per worker and reuse it."""
+    global _pipeline_parts
+
+    with _pipeline_lock:
+        if _pipeline_parts is None:
+            from customer_support.modules.rag_pipeline import RAGPipeline
+            from customer_support.modules.vector_store import VectorStoreManager
+            from customer_support.modules.document_processor import DocumentProcessor
+            from customer_support.modules.faq_index import FAQIndex
+
+            processor = DocumentProcessor()
+            vs_manager = VectorStoreManager()
+            pdf_path = os.path.join(smart_customer_support_dir, 'data', 'safebank-manual.pdf')
+
+            faq_index = None
+            if os.path.exists(Config.VECTOR_STORE_PATH):
+                vector_store = vs_manager.load_vector_store()
+                if Config.FAQ_FAST_PATH_ENABLED:
+                    faq_index = vs_manager.load_faq_index()
+            else:
+                # No built index: build one in memory for this worker only.
+                # Use `python -m customer_support.modules.index_versions build` to publish one.
+                if Config.CHUNKING_STRATEGY == 'structure':
+                    chunks = processor.process_pdf_structured(pdf_path)
+                    vector_store = vs_manager.create_vector_store(chunks)
+                else:
+                    chunks = processor.process_pdf_file(pdf_path)
+                    vector_store = vs_manager.create_vector_store(chunks[:30])  # Limit for faster response
+
+            # Versioned indexes carry their own FAQ index; the shared path is
+            # only for unversioned and in-memory indexes
+            if Config.FAQ_FAST_PATH_ENABLED and vs_manager.loaded_version is None:
+                if os.path.exists(Config.FAQ_INDEX_PATH):
+                    faq_index = FAQIndex.load(vs_manager.embeddings)
+                else:
+                    entries = processor.extract_layout_faq_entries(
+                        processor.load_pdf_elements(pdf_path), source=pdf_path
+                    )
+                    faq_index = FAQIndex.build(entries, vs_manager.embeddings)
+                    faq_index.save()
+
+            retriever = vs_manager.create_retriever(vector_store)
+            _pipeline_parts = (RAGPipeline(retriever, faq_index), vs_manager, vector_store)
+
+    return _pipeline_parts
+
+
+def _reload_index(version: str):
+    """Load a newly promoted index version and swap it in."""
+    global _pipeline_parts, _standby_parts
+
+    if not _reload_lock.acquire(blocking=False):
+        return
+
+    try:
+        from customer_support.modules.rag_pipeline import RAGPipeline
+
+        rag, vs_manager, vector_store = _pipeline_parts
+
+        if _standby_parts is not None and _standby_parts[1].loaded_version == version:
+            # Rollback to the version we served last: swap back instantly
+            print(f'Swapping back to standby index version: {version}')
+            _pipeline_parts, _standby_parts = _standby_parts, _pipeline_parts
+            return
+
+        print(f'Reloading index version: {version}')
+        from customer_support.modules.vector_store import VectorStoreManager
+
+        new_manager = VectorStoreManager(embeddings=vs_manager.embeddings)
+        new_vector_store = new_manager.load_vector_store()
+        new_vector_store.similarity_search(Config.WARMUP_QUERY, k=1)
+
+        # The FAQ index is rebuilt with each version so it matches the new manual
+        faq_index = new_manager.load_faq_index() if Config.FAQ_FAST_PATH_ENABLED else None
+
+        retriever = new_manager.create_retriever(new_vector_store)
+        new_parts = (RAGPipeline(retriever, faq_index), new_manager, new_vector_store)
+
+        # In-flight requests keep using the old pipeline object
+        _pipeline_parts, _standby_parts = new_parts, _pipeline_parts
+        _failed_versions.pop(version, None)
+        print(f'Now serving index version: {new_manager.loaded_version}')
+
+    except Exception as e:
+        # Back off so a bad version (e.g. checksum mismatch) is not re-verified
+        # and reloaded by every worker on every check
+        failures = _failed_versions.get(version, (0, 0.0))[0] + 1
+        delay = min(Config.INDEX_RELOAD_INTERVAL * 2 ** failures, Config.INDEX_RELOAD_MAX_BACKOFF)
+        _failed_versions[version] = (failures, time.monotonic() + delay)
+        print(f'Index reload of {version} failed ({failures}x), still serving previous version; '
+              f'retrying in {delay:.0f}s unless CURRENT changes: {e}')
+
+    finally:
+        _reload_lock.release()
+
+
+def maybe_reload_index():
+    """Pick up a newly promoted index version without blocking requests."""
+    global _last_reload_check
+
+    if _pipeline_parts is None or _reload_lock.locked():
+        return
+
+    now = time.monotonic()
+    if now - _last_reload_check < Config.INDEX_RELOAD_INTERVAL:
+        return
+    _last_reload_check = now
+
+    version = IndexVersionStore().current_version()
+    if version is None or version == _pipeline_parts[1].loaded_version:
+        return
+
+    # CURRENT moved on: earlier failures no longer matter
+    for failed in list(_failed_versions):
+        if failed != version:
+            del _failed_versions[failed]
+    if version in _failed_versions and now < _failed_versions[version][1]:
+        return
+
+    threading.Thread(target=_reload_index, args=(version,), name='index-reload', daemon=True).start()
+
+
+def get_pipeline_snapshot():
+    """Return the cached RAG pipeline with the index version it serves."""
+    rag, vs_manager, _ = build_pipeline()
+    maybe_reload_index()
+    return rag, vs_manager.loaded_version
+
+
+def get_rag_pipeline():
+    """Return the cached RAG pipeline."""
+    return get_pipeline_snapshot()[0]
+
+
+def start_warmup():
+    """Warm the pipeline in the background when a worker starts."""
+    if Config.WARMUP_ON_START:
+        warmup.start(build_pipeline)
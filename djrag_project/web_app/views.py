@@ -2,6 +2,7 @@ from django.shortcuts import render, redirect
 from django.http import JsonResponse
 from .forms import QueryForm
 from .models import QueryHistory
+from .utils import get_rag_pipeline, warmup
 import sys
 import os
 
@@ -19,6 +20,23 @@ def index(request):
     """Home page."""
     return render(request, 'web_app/index.html')
 
+def healthz(request):
+    """Liveness probe: the worker process is serving requests."""
+    return JsonResponse({'status': 'ok'})
+
+def readyz(request):
+    """Readiness probe: models and index are warm (LLM keep-alive is best-effort)."""
+    from customer_support.modules.config import Config
+    
+    if not Config.WARMUP_ON_START:
+        return JsonResponse({'ready': True, 'warmup': 'disabled'})
+    
+    report = warmup.report()
+    if report['ready']:
+        faq_index = get_rag_pipeline().faq_index
+        report['faq_fast_path'] = faq_index.report() if faq_index else None
+    return JsonResponse(report, status=200 if report['ready'] else 503)
+
 def query_view(request):
     """Handle user queries."""
     if request.method == 'POST':
@@ -27,26 +45,21 @@ def query_view(request):
             question = form.cleaned_data['question']
             
             try:
-                # Import RAG pipeline
-                from customer_support.modules.rag_pipeline import RAGPipeline
-                from customer_support.modules.vector_store import VectorStoreManager
-                from customer_support.modules.document_processor import DocumentProcessor
-                
-                # Initialize pipeline
-                processor = DocumentProcessor()
-                vs_manager = VectorStoreManager()
-                
-                # Load PDF - adjust path for Django
-                pdf_path = os.path.join(smart_customer_support_dir, 'data', 'safebank-manual.pdf')
-                
-                chunks = processor.process_pdf_file(pdf_path)
-                vector_store = vs_manager.create_vector_store(chunks[:30])  # Limit for faster response
-                retriever = vs_manager.create_retriever(vector_store)
-                rag = RAGPipeline(retriever)
+                # Reuse the pipeline built (and warmed) at worker start
+                rag = get_rag_pipeline()
                 
                 # Get answer
                 result = rag.query(question)
                 
+                if 'error' in result:
+                    # The LLM failed: say so (without its message) and don't record it
+                    dict = {
+                        'form': form,
+                        'error': 'The assistant is temporarily unavailable. Please try again.',
+                        'question': question
+                    }
+                    return render(request, 'web_app/query.html', context=dict, status=503)
+                
                 # Save to database
                 QueryHistory.objects.create(
                     question=question,